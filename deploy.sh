@@ -17,13 +17,9 @@ if [ -d ".venv" ]; then
     echo ""
 fi
 
-# Step 2. Sync from Drive
-echo "🔄 Syncing from Google Drive..."
-python scripts/sync_from_drive.py
-
-# 3. Optimize Images
-echo "🖼️  Optimizing images..."
-python scripts/optimize_images.py
+# Step 2 & 3. Sync from Drive and optimize images as they download
+echo "🔄 Syncing from Google Drive and optimizing images..."
+python scripts/pipeline.py
 
 # 4. Generate Site
 echo "🏗️  Building site..."
@@ -0,0 +1,9 @@
+"""
+Portfolio build scripts, runnable as `python -m scripts <command>`
+
+The modules import each other by bare name so each can also run directly
+(python scripts/<name>.py). Importing the package leaves sys.path alone:
+only the CLI process (cli.main()) puts this directory on it, so generic
+module names like cli, quality or inventory never shadow installed
+packages in a process that merely imports this one.
+"""
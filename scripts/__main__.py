@@ -0,0 +1,5 @@
+"""python -m scripts <command> — see cli.py"""
+
+from . import cli
+
+cli.main()
@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+Build Benchmark
+Generates a synthetic photo corpus and times every build stage cold and warm
+(sync from a fake Drive, optimize, scan, data write, image copy), writing
+wall time and peak RSS per stage as JSON for regression comparison
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+import imaging
+
+# Benchmark Settings
+DEFAULT_CATEGORIES = 4
+DEFAULT_IMAGES = 25             # Per category
+DEFAULT_WIDTH = 3000
+DEFAULT_HEIGHT = 2000
+DEFAULT_FORMATS = ['jpg']       # Cycled per image: jpg, png, webp, heic
+DEFAULT_OUTPUT = 'benchmark.json'
+STAGES = ['sync', 'optimize', 'scan', 'data', 'copy']  # In pipeline order
+CORPUS_SEED = 1234
+NOISE_TILE = 256                # Seeded grain tile repeated over each image
+IMPORT_RUNS = 5                 # Import timings keep the best of this many fresh interpreters
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ALPHA_PROBE = 'alpha_probe.png'  # Added for backend comparisons
+PIXEL_TOLERANCE = 3.0           # Max mean absolute difference (0-255) between backends' outputs
+PIXEL_MIN_SSIM = 0.97
+FAKE_PARENT_ID = 'benchmark-root'  # Drive folder the fake sync lists
+
+FORMAT_SAVE_ARGS = {
+    'jpg': ('JPEG', {'quality': 92}),
+    'png': ('PNG', {}),
+    'webp': ('WEBP', {'quality': 90}),
+    'heic': ('HEIF', {'quality': 90}),
+}
+MIME_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp', 'heic': 'image/heic'}
+
+# --- Synthetic corpus ---
+
+def synthetic_image(rng, width, height):
+    """Smooth colour fields plus seeded grain, so JPEG sizes resemble photos"""
+    from PIL import Image
+
+    coarse = Image.frombytes('RGB', (12, 8), rng.randbytes(12 * 8 * 3))
+    img = coarse.resize((width, height), Image.BICUBIC)
+
+    tile = Image.frombytes('L', (NOISE_TILE, NOISE_TILE), rng.randbytes(NOISE_TILE * NOISE_TILE))
+    grain = Image.new('L', (width, height))
+    for x in range(0, width, NOISE_TILE):
+        for y in range(0, height, NOISE_TILE):
+            grain.paste(tile, (x, y))
+    return Image.blend(img, grain.convert('RGB'), 0.15)
+
+def generate_corpus(root, categories, images, width, height, formats):
+    """Write <root>/<Category N>/img_NNNN.<ext>; every third image is portrait"""
+    if 'heic' in formats:
+        try:
+            import pillow_heif
+            pillow_heif.register_heif_opener()
+        except ImportError:
+            print("   ⚠️  pillow_heif not installed - skipping HEIC")
+            formats = [fmt for fmt in formats if fmt != 'heic'] or ['jpg']
+
+    rng = random.Random(CORPUS_SEED)
+    total_bytes = 0
+    for c in range(categories):
+        category_dir = os.path.join(root, f"Category {c + 1:02d}")
+        os.makedirs(category_dir, exist_ok=True)
+        for i in range(images):
+            ext = formats[i % len(formats)]
+            size = (height, width) if i % 3 == 2 else (width, height)
+            path = os.path.join(category_dir, f"img_{i:04d}.{ext}")
+            fmt, save_args = FORMAT_SAVE_ARGS[ext]
+            synthetic_image(rng, *size).save(path, fmt, **save_args)
+            total_bytes += os.path.getsize(path)
+    return formats, total_bytes
+
+# --- Fake Drive ---
+
+class FakeRequest:
+    def __init__(self, execute, headers=None):
+        self._execute = execute
+        self.headers = headers if headers is not None else {}
+
+    def execute(self):
+        return self._execute(self)
+
+class FakeDrive:
+    """Just enough of the Drive v3 client for sync_photos(), served from a local tree"""
+
+    def __init__(self, root, parent_id):
+        self.folders = []
+        self.images = {}
+        self.paths = {}
+        for category in sorted(os.listdir(root)):
+            category_dir = os.path.join(root, category)
+            if not os.path.isdir(category_dir):
+                continue
+            folder_id = f"folder-{len(self.folders)}"
+            self.folders.append({'id': folder_id, 'name': category})
+            for name in sorted(os.listdir(category_dir)):
+                path = os.path.join(category_dir, name)
+                ext = os.path.splitext(name)[1].lower().lstrip('.')
+                with open(path, 'rb') as f:
+                    md5 = hashlib.md5(f.read()).hexdigest()
+                file_id = f"file-{len(self.images)}"
+                self.images[file_id] = {
+                    'id': file_id, 'name': name,
+                    'mimeType': MIME_TYPES.get(ext, 'image/jpeg'),
+                    'webViewLink': f"https://drive.google.com/file/d/{file_id}/view",
+                    'size': str(os.path.getsize(path)), 'md5Checksum': md5,
+                    'modifiedTime': '2024-01-01T00:00:00.000Z', 'parents': [folder_id],
+                }
+                self.paths[file_id] = path
+        self.parent_id = parent_id
+
+    def files(self):
+        return self
+
+    def changes(self):
+        return FakeChanges()
+
+    def list(self, q, fields=None, pageSize=1000, pageToken=None):
+        if 'vnd.google-apps.folder' in q:
+            results = self.folders if f"'{self.parent_id}' in parents" in q else []
+        else:
+            results = [image for image in self.images.values()
+                       if f"'{image['parents'][0]}' in parents" in q]
+        start = int(pageToken or 0)
+        page = {'files': results[start:start + pageSize]}
+        if start + pageSize < len(results):
+            page['nextPageToken'] = str(start + pageSize)
+        return FakeRequest(lambda request: page)
+
+    def get_media(self, fileId):
+        def read_range(request):
+            start, end = request.headers['Range'][len('bytes='):].split('-')
+            with open(self.paths[fileId], 'rb') as f:
+                f.seek(int(start))
+                return f.read(int(end) - int(start) + 1)
+        return FakeRequest(read_range)
+
+class FakeChanges:
+    """An empty changes feed: warm runs see nothing new"""
+
+    def getStartPageToken(self):
+        return FakeRequest(lambda request: {'startPageToken': '1'})
+
+    def list(self, pageToken, **kwargs):
+        return FakeRequest(lambda request: {'changes': [], 'newStartPageToken': pageToken})
+
+# --- Stages (each runs in its own process so peak RSS is per stage) ---
+
+def configure(workdir):
+    """Point the build scripts at the benchmark's working directory"""
+    import optimize_images
+    import generate_site
+
+    optimize_images.INPUT_DIR = os.path.join(workdir, 'photos')
+    optimize_images.OUTPUT_DIR = os.path.join(workdir, 'optimized')
+    optimize_images.MANIFEST_PATH = os.path.join(optimize_images.OUTPUT_DIR, '.manifest.json')
+    optimize_images.PHASH_CACHE_PATH = os.path.join(optimize_images.OUTPUT_DIR, '.phash_cache.json')
+
+    generate_site.PHOTOS_DIR = optimize_images.OUTPUT_DIR
+    generate_site.SITE_DIR = os.path.join(workdir, 'site')
+    generate_site.METADATA_CACHE_PATH = os.path.join(generate_site.PHOTOS_DIR, '.metadata_cache.json')
+    generate_site.FINGERPRINT_CACHE_PATH = os.path.join(generate_site.PHOTOS_DIR, '.fingerprint_cache.json')
+    return optimize_images, generate_site
+
+def stage_sync(workdir, args):
+    photos_dir = os.path.join(workdir, 'photos')
+    remote_dir = os.path.join(workdir, 'remote')
+    import sync_from_drive
+
+    # The fake Drive doesn't need the repo's config.json or credentials
+    sync_from_drive._config = {'google_drive_folder_id': FAKE_PARENT_ID}
+    sync_from_drive.LOCAL_PHOTOS_DIR = photos_dir
+    sync_from_drive.SYNC_STATE_PATH = os.path.join(photos_dir, '.sync_state.json')
+    fake = FakeDrive(remote_dir, FAKE_PARENT_ID)
+    sync_from_drive.load_credentials = lambda: 'fake-credentials'
+    sync_from_drive.build_service = lambda creds: fake
+
+    start = time.perf_counter()
+    sync_from_drive.sync_photos(concurrency=args.concurrency)
+    return {'seconds': time.perf_counter() - start}
+
+def stage_optimize(workdir, args):
+    optimize_images, _ = configure(workdir)
+    start = time.perf_counter()
+    optimize_images.process_all_images(workers=args.workers)
+    return {'seconds': time.perf_counter() - start}
+
+def stage_scan(workdir, args):
+    _, generate_site = configure(workdir)
+    links_path = os.path.join(workdir, 'drive_links.json')
+    drive_links = {}
+    if os.path.exists(links_path):
+        with open(links_path, 'r') as f:
+            drive_links = json.load(f)
+
+    start = time.perf_counter()
+    portfolio_data = generate_site.scan_photos(drive_links, generate_site.load_build_manifest(),
+                                                generate_site.load_duplicates())
+    elapsed = time.perf_counter() - start
+
+    # Handed to the data stage so it times only the write
+    with open(os.path.join(workdir, 'portfolio.json'), 'w') as f:
+        json.dump(portfolio_data, f)
+    return {'seconds': elapsed}
+
+def stage_data(workdir, args):
+    _, generate_site = configure(workdir)
+    with open(os.path.join(workdir, 'portfolio.json'), 'r') as f:
+        portfolio_data = json.load(f)
+    generate_site.setup_site_directory()
+
+    start = time.perf_counter()
+    generate_site.generate_data_json(portfolio_data)
+    return {'seconds': time.perf_counter() - start}
+
+def stage_copy(workdir, args):
+    _, generate_site = configure(workdir)
+    generate_site.setup_site_directory()
+    start = time.perf_counter()
+    generate_site.copy_images({})
+    return {'seconds': time.perf_counter() - start}
+
+STAGE_FUNCTIONS = {
+    'sync': stage_sync,
+    'optimize': stage_optimize,
+    'scan': stage_scan,
+    'data': stage_data,
+    'copy': stage_copy,
+}
+
+def children_peak_rss_mb():
+    """Largest reaped child's ru_maxrss in MB (Linux reports KB, macOS bytes)"""
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def run_stage(args):
+    """Child process entry point: run one stage and write its result file
+
+    Peak RSS is the kernel's VmHWM, restarted at the top: ru_maxrss
+    survives fork+exec, so it would report at least the driver's peak.
+    """
+    import optimize_images
+
+    os.chdir(args.workdir)  # sync_photos writes drive_links.json to the cwd
+    optimize_images.reset_peak_rss()
+    result = STAGE_FUNCTIONS[args.stage](args.workdir, args)
+    result['peak_rss_mb'] = round(optimize_images.peak_rss_mb(), 1)
+    # Largest worker process (e.g. optimize's process pool), once reaped
+    children = children_peak_rss_mb()
+    if children:
+        result['peak_child_rss_mb'] = round(children, 1)
+    if 'seconds' in result:
+        result['seconds'] = round(result['seconds'], 3)
+    with open(args.result, 'w') as f:
+        json.dump(result, f)
+
+def spawn_stage(stage, workdir, args, backend=None):
+    """Run a stage in a fresh interpreter and return its result"""
+    result_path = os.path.join(workdir, f".{stage}.result.json")
+    command = [sys.executable, os.path.abspath(__file__), '--stage', stage,
+               '--workdir', workdir, '--result', result_path,
+               '--workers', str(args.workers), '--concurrency', str(args.concurrency)]
+    output = None if args.verbose else subprocess.DEVNULL
+    env = dict(os.environ, **{imaging.BACKEND_ENV: backend or args.backends[0]})
+    completed = subprocess.run(command, stdout=output, stderr=output, env=env)
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        return {'error': f"exit status {completed.returncode}"}
+    with open(result_path, 'r') as f:
+        result = json.load(f)
+    os.remove(result_path)
+    return result
+
+# --- Imaging backends ---
+
+def alpha_image(width, height):
+    """RGBA gradient with a fully transparent hole and a half-transparent band
+
+    Checks that every backend flattens transparency onto the same white.
+    """
+    from PIL import Image, ImageDraw
+
+    gradient = Image.linear_gradient('L')
+    img = Image.merge('RGBA', (gradient.resize((width, height)),
+                               gradient.transpose(Image.Transpose.ROTATE_90).resize((width, height)),
+                               Image.new('L', (width, height), 90),
+                               Image.new('L', (width, height), 255)))
+    alpha = ImageDraw.Draw(img)  # Draws replace pixels, alpha included
+    alpha.ellipse((width // 4, height // 4, width // 2, height // 2), fill=(0, 0, 0, 0))
+    alpha.rectangle((0, height * 2 // 3, width, height * 5 // 6), fill=(200, 40, 40, 128))
+    return img
+
+def output_difference(reference_path, path):
+    """(max per-channel mean absolute difference, SSIM) of two outputs, or None if sizes differ
+
+    SSIM runs on PROBE_SIZE thumbnails of both, since it's pure Python.
+    """
+    from PIL import Image, ImageChops, ImageStat
+    import quality
+    import optimize_images
+
+    with Image.open(reference_path) as a, Image.open(path) as b:
+        a, b = a.convert('RGB'), b.convert('RGB')
+    if a.size != b.size:
+        return None
+    mad = max(ImageStat.Stat(ImageChops.difference(a, b)).mean)
+    backend = imaging.PillowBackend()
+    probe = (optimize_images.PROBE_SIZE, optimize_images.PROBE_SIZE)
+    a.thumbnail(probe)
+    b.thumbnail(probe)
+    return mad, quality.ssim_planes(backend.planes(a), backend.planes(b))
+
+def compare_backends(workdir, args):
+    """Cold optimize runs of the same corpus with each imaging backend
+
+    Besides time and memory, each backend's outputs are checked against the
+    first one's, since backends must be interchangeable: the same
+    dimensions and derivatives, and pixels within PIXEL_TOLERANCE (mean
+    absolute difference) and PIXEL_MIN_SSIM. An RGBA probe image is added
+    to the corpus for these runs so alpha flattening is compared too.
+    """
+    output_dir = os.path.join(workdir, 'optimized')
+    photos_dir = os.path.join(workdir, 'photos')
+    categories = sorted(d for d in os.listdir(photos_dir)
+                        if not d.startswith('.') and os.path.isdir(os.path.join(photos_dir, d)))
+    probe_path = os.path.join(photos_dir, categories[0], ALPHA_PROBE)
+    alpha_image(args.width, args.height).save(probe_path, 'PNG')
+    results = {}
+    outputs = {}   # backend → its optimized/ tree, kept until compared
+    reference = None
+    print("\n   backends (cold optimize):")
+    try:
+        for backend in args.backends:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            result = spawn_stage('optimize', workdir, args, backend=backend)
+            results[backend] = result
+            if 'seconds' not in result:
+                print(f"      {backend:<9} {result.get('error')}")
+                continue
+            with open(os.path.join(output_dir, '.manifest.json'), 'r') as f:
+                files = {key: entry for key, entry in json.load(f)['files'].items() if 'width' in entry}
+            outputs[backend] = f"{output_dir}.{backend}"
+            shutil.rmtree(outputs[backend], ignore_errors=True)
+            shutil.move(output_dir, outputs[backend])
+            sizes = {key: (entry['width'], entry['height'], entry.get('variants')) for key, entry in files.items()}
+            result['images'] = len(files)
+            result['bytes_out'] = sum(entry.get('bytes_out', 0) for entry in files.values())
+            if reference is None:
+                reference = (backend, files, sizes)
+            else:
+                result['size_mismatches'] = sorted(key for key in set(reference[2]) | set(sizes)
+                                                   if reference[2].get(key) != sizes.get(key))
+                compare_pixels(outputs[reference[0]], outputs[backend], reference[1], files, result)
+            print(f"      {backend:<9} {result['seconds']:8.2f}s  "
+                  f"{result.get('peak_child_rss_mb', result['peak_rss_mb']):7.1f} MB peak  "
+                  f"{result['bytes_out'] / (1024 * 1024):8.1f} MB out"
+                  + (f"  ({len(result['size_mismatches'])} size mismatches)"
+                     if result.get('size_mismatches') else "")
+                  + (f"  (pixels: worst diff {result['worst_pixel_diff']:.2f}, "
+                     f"min SSIM {result['min_ssim']:.4f}, {len(result['pixel_mismatches'])} mismatches)"
+                     if 'min_ssim' in result else ""))
+    finally:
+        os.remove(probe_path)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        for path in outputs.values():
+            shutil.rmtree(path, ignore_errors=True)
+    return results
+
+def compare_pixels(reference_dir, output_dir, reference_files, files, result):
+    """Add worst_pixel_diff, min_ssim and pixel_mismatches to result"""
+    import optimize_images
+
+    worst, lowest, mismatches = 0.0, 1.0, []
+    for key in sorted(set(reference_files) & set(files)):
+        entry = files[key]
+        paths = [entry['output']] + [optimize_images.derivative_path(entry['output'], width)
+                                     for width in entry.get('variants', [])]
+        for rel_path in paths:
+            reference_path = os.path.join(reference_dir, rel_path)
+            path = os.path.join(output_dir, rel_path)
+            if not (os.path.exists(reference_path) and os.path.exists(path)):
+                continue
+            difference = output_difference(reference_path, path)
+            if difference is None:
+                continue  # Already counted as a size mismatch
+            mad, score = difference
+            worst, lowest = max(worst, mad), min(lowest, score)
+            if mad > PIXEL_TOLERANCE or score < PIXEL_MIN_SSIM:
+                mismatches.append(rel_path)
+    result.update(worst_pixel_diff=round(worst, 3), min_ssim=round(lowest, 4),
+                  pixel_mismatches=mismatches)
+
+# --- Import time ---
+
+def time_command(command, runs):
+    """Best wall-clock seconds of running command in a fresh interpreter"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=SCRIPTS_DIR,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        if completed.returncode != 0:
+            return None
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def measure_imports(runs=IMPORT_RUNS):
+    """Startup cost of each CLI command's module, net of a bare interpreter
+
+    Also times `status` end to end, the command that should answer in well
+    under a second because it never imports Pillow or the Google client.
+    """
+    import cli
+    baseline = time_command([sys.executable, '-c', 'pass'], runs)
+    modules = ['cli'] + sorted({module for module, _ in cli.COMMANDS.values()})
+    results = {'interpreter_ms': round(baseline * 1000, 1), 'modules': {}}
+
+    print(f"   Import time (best of {runs}, interpreter {baseline * 1000:.0f} ms excluded):")
+    for module in modules:
+        seconds = time_command([sys.executable, '-c', f'import {module}'], runs)
+        if seconds is None:
+            print(f"      {module:<16} failed to import")
+            continue
+        results['modules'][module] = round((seconds - baseline) * 1000, 1)
+        print(f"      {module:<16} {(seconds - baseline) * 1000:7.1f} ms")
+
+    seconds = time_command([sys.executable, 'cli.py', 'status'], runs)
+    if seconds is not None:
+        results['status_ms'] = round(seconds * 1000, 1)
+        print(f"      {'status command':<16} {seconds * 1000:7.1f} ms total")
+    return results
+
+# --- Driver ---
+
+def environment():
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        import PIL
+        info['pillow'] = PIL.__version__
+    except ImportError:
+        pass
+    try:
+        import pyvips
+        info['pyvips'] = pyvips.__version__
+        info['libvips'] = '.'.join(str(pyvips.version(part)) for part in range(3))
+    except (ImportError, OSError):
+        pass
+    return info
+
+def run_benchmark(args):
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='portfolio-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    stages = [stage for stage in STAGES if stage in args.stages]
+
+    print("⏱️  Build Benchmark")
+    print(f"   Corpus: {args.categories} categories × {args.images} images, "
+          f"{args.width}x{args.height} {','.join(args.formats)}")
+    print(f"   Backend: {', '.join(args.backends)}")
+    print(f"   Working directory: {workdir}")
+    print()
+
+    try:
+        start = time.perf_counter()
+        formats, corpus_bytes = generate_corpus(
+            os.path.join(workdir, 'remote'), args.categories, args.images,
+            args.width, args.height, args.formats)
+        print(f"   Generated corpus: {corpus_bytes / (1024 * 1024):.1f} MB "
+              f"in {time.perf_counter() - start:.1f}s")
+        if 'sync' not in stages and not os.path.exists(os.path.join(workdir, 'photos')):
+            shutil.copytree(os.path.join(workdir, 'remote'), os.path.join(workdir, 'photos'))
+
+        # Cold: empty outputs and caches. Warm: the same build again, nothing changed.
+        # The OS page cache isn't dropped, so "cold" is about build state only.
+        results = {}
+        for run in ('cold', 'warm'):
+            print(f"\n   {run}:")
+            results[run] = {}
+            for stage in stages:
+                result = spawn_stage(stage, workdir, args)
+                results[run][stage] = result
+                if 'seconds' in result:
+                    print(f"      {stage:<9} {result['seconds']:8.2f}s  "
+                          f"{result['peak_rss_mb']:7.1f} MB peak"
+                          + (f" (workers {result['peak_child_rss_mb']:.1f} MB)"
+                             if 'peak_child_rss_mb' in result else ""))
+                else:
+                    print(f"      {stage:<9} {result['error']}")
+
+        backends = compare_backends(workdir, args) if len(args.backends) > 1 else None
+
+        print()
+        imports = measure_imports()
+
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'environment': environment(),
+            'corpus': {
+                'categories': args.categories,
+                'images_per_category': args.images,
+                'width': args.width,
+                'height': args.height,
+                'formats': formats,
+                'bytes': corpus_bytes,
+            },
+            'settings': {'workers': args.workers, 'concurrency': args.concurrency,
+                         'backend': args.backends[0]},
+            'results': results,
+            'backends': backends,
+            'imports': imports,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the build stages on a synthetic photo corpus")
+    parser.add_argument('--categories', type=int, default=DEFAULT_CATEGORIES,
+                        help=f"Number of categories (default: {DEFAULT_CATEGORIES})")
+    parser.add_argument('--images', type=int, default=DEFAULT_IMAGES,
+                        help=f"Images per category (default: {DEFAULT_IMAGES})")
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH,
+                        help=f"Image width in px (default: {DEFAULT_WIDTH})")
+    parser.add_argument('--height', type=int, default=DEFAULT_HEIGHT,
+                        help=f"Image height in px (default: {DEFAULT_HEIGHT})")
+    parser.add_argument('--formats', type=lambda value: value.split(','), default=DEFAULT_FORMATS,
+                        help="Comma-separated source formats, cycled per image: "
+                             "jpg,png,webp,heic (default: jpg)")
+    parser.add_argument('--stages', type=lambda value: value.split(','), default=STAGES,
+                        help=f"Comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Optimize worker processes (default: CPU count)")
+    parser.add_argument('--backends', type=lambda value: value.split(','),
+                        default=[imaging.backend_name()],
+                        help="Comma-separated imaging backends; the first runs the stages, and "
+                             "with several, each also does a cold optimize for comparison "
+                             "(e.g. pillow,vips)")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Parallel fake-Drive downloads (default: 4)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"Results JSON path (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--workdir', help="Build here instead of a temporary directory (kept afterwards)")
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary working directory")
+    parser.add_argument('--verbose', action='store_true', help="Show each stage's own output")
+    parser.add_argument('--imports', action='store_true',
+                        help="Only measure command import/startup times (no corpus)")
+    # Internal: run a single stage in this process
+    parser.add_argument('--stage', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.formats) - set(FORMAT_SAVE_ARGS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+    unknown = set(args.backends) - set(imaging.BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    return args
+
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts benchmark`"""
+    args = parse_args(argv)
+    if args.stage:
+        run_stage(args)
+    elif args.imports:
+        print("⏱️  Import Benchmark")
+        with open(args.output, 'w') as f:
+            json.dump({'timestamp': datetime.now(timezone.utc).isoformat(),
+                       'environment': environment(),
+                       'imports': measure_imports()}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    else:
+        run_benchmark(args)
+
+if __name__ == '__main__':
+    cli()
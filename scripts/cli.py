@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Portfolio CLI
+One entry point for every build step: `python -m scripts <command>`.
+Each command's module (and with it Pillow or the Google client) is only
+imported once that command runs
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import importlib
+
+PROG = 'python -m scripts'
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# command → (module with a cli(argv) entry point, description)
+COMMANDS = {
+    'sync': ('sync_from_drive', "Sync photos from Google Drive"),
+    'optimize': ('optimize_images', "Optimize photos for web delivery"),
+    'pipeline': ('pipeline', "Sync and optimize photos as they arrive"),
+    'build': ('generate_site', "Generate the static site"),
+    'watch': ('watch', "Rebuild continuously as photos change"),
+    'preview': ('preview', "Serve the site straight from photos/, resizing on demand"),
+    'benchmark': ('benchmark', "Benchmark the build stages"),
+}
+STATUS_COMMANDS = ('status', 'dry-run')
+
+def usage():
+    lines = [f"usage: {PROG} <command> [options]", "", "commands:"]
+    for command, (_, description) in COMMANDS.items():
+        lines.append(f"  {command:<11}{description}")
+    lines.append(f"  {'status':<11}Show what a build would do, without doing it (alias: dry-run)")
+    lines.append("")
+    lines.append(f"Run '{PROG} <command> --help' for a command's options.")
+    return '\n'.join(lines)
+
+def use_script_imports():
+    """Let the command modules import each other by bare name
+
+    They do so to also run as plain scripts (python scripts/<name>.py),
+    which puts this directory first on sys.path; `python -m scripts` does
+    the same here, for this process only.
+    """
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+
+def site_data_path(site_dir):
+    """The data entry point site/index.html loads, or index.html itself
+
+    The build fingerprints it (data/manifest.<hash>.json) and records the
+    URL only in index.html's data-portfolio attribute.
+    """
+    index_path = os.path.join(site_dir, 'index.html')
+    try:
+        with open(index_path, 'r') as f:
+            match = re.search(r'data-portfolio="([^"]+)"', f.read())
+    except OSError:
+        return index_path
+    if match and os.path.exists(os.path.join(site_dir, match.group(1))):
+        return os.path.join(site_dir, match.group(1))
+    return index_path
+
+def age(path):
+    """How long ago path was modified, e.g. "5m ago", or "never" if missing"""
+    if not os.path.exists(path):
+        return "never"
+    seconds = time.time() - os.path.getmtime(path)
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{seconds / size:.0f}{unit} ago"
+    return f"{seconds:.0f}s ago"
+
+def status(argv):
+    """Compare photos/ with the build manifest using only stat() calls
+
+    Source hashes and Pillow-dependent settings aren't checked, so this
+    never decodes or hashes anything; a real run may still find settings
+    changes to apply.
+    """
+    parser = argparse.ArgumentParser(prog=f"{PROG} status",
+                                     description="Show what a build would do, without doing it")
+    parser.parse_args(argv)
+    start = time.perf_counter()
+
+    import inventory
+    import optimize_images
+    import generate_site
+
+    manifest = optimize_images.load_manifest()['files']
+    photos = inventory.Inventory(optimize_images.INPUT_DIR)
+    outputs = inventory.Inventory(optimize_images.OUTPUT_DIR)
+    sources = {}
+    for category in photos.categories():
+        for name in photos.listdir(category):
+            if os.path.splitext(name.lower())[1] in optimize_images.SUPPORTED_FORMATS:
+                sources[f"{category}/{name}"] = photos.stat(f"{category}/{name}")
+
+    new = changed = missing = aliased = 0
+    for key, stat in sources.items():
+        entry = manifest.get(key)
+        if entry is None:
+            new += 1
+        elif entry.get('size') != stat.st_size or entry.get('mtime') != stat.st_mtime:
+            changed += 1
+        elif 'duplicate_of' in entry:
+            aliased += 1
+        elif not outputs.stat(entry['output'].replace(os.sep, '/')):
+            missing += 1
+    removed = len(set(manifest) - set(sources))
+    categories = {key.split('/', 1)[0] for key in sources}
+    mb = sum(stat.st_size for stat in sources.values()) / (1024 * 1024)
+
+    data_entry = site_data_path(generate_site.SITE_DIR)
+    sync_state = os.path.join(optimize_images.INPUT_DIR, '.sync_state.json')
+
+    print("📋 Portfolio Status (dry run)")
+    print(f"   Photos: {len(sources)} in {len(categories)} categories ({mb:.1f} MB)")
+    print(f"   Up to date: {len(sources) - new - changed - missing - aliased} optimized, "
+          f"{aliased} duplicate aliases")
+    if new or changed or missing:
+        print(f"   Would optimize: {new} new, {changed} changed, {missing} with missing output")
+    if removed:
+        print(f"   Would prune: {removed} removed photos")
+    print(f"   Last Drive sync: {age(sync_state)}")
+    print(f"   Site data: {age(data_entry)}")
+    print(f"   ({(time.perf_counter() - start) * 1000:.0f} ms; "
+          f"settings changes are only detected by a real run)")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return
+    command, rest = argv[0], argv[1:]
+    use_script_imports()
+    if command in STATUS_COMMANDS:
+        status(rest)
+        return
+    if command not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        sys.exit(f"\n{PROG}: unknown command '{command}'")
+
+    # Commands parse their own options; argparse names itself after argv[0]
+    sys.argv = [f"{PROG} {command}"] + rest
+    importlib.import_module(COMMANDS[command][0]).cli(rest)
+
+if __name__ == '__main__':
+    main()
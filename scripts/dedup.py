@@ -0,0 +1,144 @@
+"""
+Near-Duplicate Detection
+Perceptual (difference) hashes for source photos and a BK-tree index that
+finds every hash within a Hamming distance without comparing against all
+of them
+"""
+
+import os
+import json
+import math
+
+HASH_SIZE = 8                # 8x8 comparisons → 64-bit hash
+THUMB_SIZE = 8               # RGB thumbnail compared before two hashes are trusted
+CACHE_VERSION = 2
+
+# A hash match alone isn't enough: flat and smooth-gradient images all hash
+# to (nearly) all zeros or all ones, whatever their colour
+MIN_HASH_BITS = 8            # Hashes with fewer set (or unset) bits are never aliased
+ASPECT_TOLERANCE = 0.02      # Max relative aspect ratio difference
+THUMB_TOLERANCE = 10.0       # Max mean absolute thumbnail difference (0-255)
+
+def image_hash(path):
+    """Difference hash of an image plus what's needed to confirm a match
+
+    Returns the hash cache entry: {'hash': 16 hex digits, 'pixels':
+    width * height, 'aspect': width / height, 'thumb': THUMB_SIZE² RGB
+    pixels as hex}. JPEGs are decoded at 1/8 scale via draft mode, so
+    hashing costs a fraction of a full decode.
+    """
+    from PIL import Image, ImageOps
+    with Image.open(path) as img:
+        pixels = img.width * img.height
+        img.draft('RGB', (HASH_SIZE * 8, HASH_SIZE * 8))
+        rgb = ImageOps.exif_transpose(img).convert('RGB')
+    small = rgb.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    thumb = rgb.resize((THUMB_SIZE, THUMB_SIZE), Image.Resampling.BOX)
+    data = small.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (data[offset + col] > data[offset + col + 1])
+    return {'hash': f"{value:016x}", 'pixels': pixels, 'aspect': rgb.width / rgb.height,
+            'thumb': thumb.tobytes().hex()}
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def is_distinctive(value):
+    """Whether a hash carries enough detail to be matched at all"""
+    bits = bin(value).count('1')
+    return MIN_HASH_BITS <= bits <= HASH_SIZE * HASH_SIZE - MIN_HASH_BITS
+
+def same_picture(a, b):
+    """Confirm a hash match: same shape, and thumbnails close pixel by pixel"""
+    if abs(math.log(a['aspect'] / b['aspect'])) > ASPECT_TOLERANCE:
+        return False
+    thumb_a, thumb_b = bytes.fromhex(a['thumb']), bytes.fromhex(b['thumb'])
+    difference = sum(abs(x - y) for x, y in zip(thumb_a, thumb_b))
+    return difference / len(thumb_a) <= THUMB_TOLERANCE
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance
+
+    A lookup only descends into children whose edge distance is within
+    max_distance of the query's distance to the node, so near-duplicate
+    queries touch a small part of the tree instead of every hash.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value, key):
+        if self.root is None:
+            self.root = (value, key, {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, key, {})
+                return
+            node = child
+
+    def find(self, value, max_distance):
+        """[(distance, key)] of every stored hash within max_distance"""
+        matches = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[1]))
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches)
+
+def load_cache(path):
+    """{sha256: image_hash() entry}, or {} if missing/unreadable"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                cache = json.load(f)
+            if cache.get('version') == CACHE_VERSION:
+                return cache['hashes']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   ⚠️  Ignoring unreadable hash cache {path}: {e}")
+    return {}
+
+def save_cache(path, hashes):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'hashes': hashes}, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def find_duplicates(sources, hashes, max_distance):
+    """Map each near-duplicate source key to the copy that is kept
+
+    sources is [(key, sha256, size)]. The copy with the most pixels (then
+    the largest file, then the first key) of each group is kept, so the
+    choice doesn't depend on listing order. A hash match only counts once
+    same_picture() confirms it, and featureless hashes never match.
+    """
+    def rank(source):
+        key, sha256, size = source
+        return (-hashes[sha256]['pixels'], -size, key)
+
+    tree = BKTree()
+    duplicates = {}
+    kept = {}
+    for key, sha256, size in sorted(sources, key=rank):
+        value = int(hashes[sha256]['hash'], 16)
+        if not is_distinctive(value):
+            continue
+        match = next((match_key for _, match_key in tree.find(value, max_distance)
+                      if same_picture(hashes[sha256], hashes[kept[match_key]])), None)
+        if match:
+            duplicates[key] = match
+        else:
+            tree.add(value, key)
+            kept[key] = sha256
+    return duplicates
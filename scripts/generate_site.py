@@ -5,16 +5,40 @@ Scans local photo folders and generates data.json + website files
 """
 
 import os
+import io
+import re
+import copy
+import gzip
 import json
+import time
+import base64
 import shutil
+import hashlib
+import argparse
 from pathlib import Path
 
+import inventory
+import instrumentation
+
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PHOTOS_DIR = os.path.join(BASE_DIR, 'optimized')  # Use optimized images
 SITE_DIR = os.path.join(BASE_DIR, 'site')
 SRC_DIR = os.path.join(BASE_DIR, 'src')
 SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.webp'}  # Excluding HEIC - converted to JPG
+METADATA_CACHE_PATH = os.path.join(PHOTOS_DIR, '.metadata_cache.json')
+PLACEHOLDER_WIDTH = 16   # Width of the blurred LQIP thumbnail embedded in data.json
+DATA_MODE = 'sharded'    # 'sharded' (data/manifest.json + per-page shards) or 'single' (data.json)
+PAGE_SIZE = 12           # Images per shard; matches the gallery's "Load More" batch
+FINGERPRINT_ASSETS = True  # Content-hashed asset names so the CDN can cache them immutably
+FINGERPRINT_CACHE_PATH = os.path.join(PHOTOS_DIR, '.fingerprint_cache.json')
+HASH_LENGTH = 10         # Hex digits of SHA-256 kept in fingerprinted names
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+ENTRY_CACHE = 'public, max-age=60, must-revalidate'  # index.html must pick up new hashes quickly
+MINIFY_ASSETS = True     # Strip comments/whitespace from style.css and script.js
+COMPRESSED_EXTENSIONS = {'.html', '.css', '.js', '.json'}  # Get .gz/.br siblings
+MIN_COMPRESS_SIZE = 256  # Bytes; smaller files aren't worth a sibling
+LINK_MODE = 'hardlink'  # How site/images gets files: 'hardlink', 'reflink' or 'copy' (falls back to copy)
 
 def load_config():
     """Load user configuration with strict validation"""
@@ -48,8 +72,214 @@ def load_drive_links():
             return json.load(f)
     return {}
 
-def scan_photos(drive_links):
-    """Scan photo directories and build portfolio data structure"""
+def build_drive_link_index(drive_links):
+    """Index drive_links by (category, base name) in a single pass
+
+    Keys are "<category>/<name>" as written by sync_from_drive.py; older
+    flat "<name>" keys are indexed under category None. Each index entry
+    maps to the list of link names sharing that base name, so ambiguous
+    matches (e.g. IMG_1.HEIC and IMG_1.jpg) can be reported.
+    """
+    index = {}
+    for link_name in drive_links:
+        category, _, name = link_name.rpartition('/')
+        base_name = os.path.splitext(name)[0]
+        index.setdefault((category or None, base_name), []).append(link_name)
+    return index
+
+def resolve_drive_link(drive_links, link_index, category, file, issues):
+    """Find the Drive link for an optimized image in O(1)
+
+    Tries the exact name, then the base name (HEIC → jpg conversions),
+    first within the category and then among legacy uncategorized keys.
+    Ambiguous and missing links are recorded in issues for a summary.
+    """
+    base_name = os.path.splitext(file)[0]
+    for scope in (category, None):
+        exact = f"{scope}/{file}" if scope else file
+        if exact in drive_links:
+            candidates = [exact]
+        else:
+            candidates = link_index.get((scope, base_name), [])
+        if not candidates:
+            continue
+        if len(candidates) > 1:
+            issues['ambiguous'].append((f"{category}/{file}", sorted(candidates)))
+        if scope is None:
+            issues['legacy'].setdefault(candidates[0], set()).add(category)
+        return drive_links[sorted(candidates)[0]]
+    
+    issues['missing'].append(f"{category}/{file}")
+    return ""
+
+def report_drive_link_issues(issues):
+    """Warn about images whose Drive link was ambiguous or not found"""
+    for image, candidates in issues['ambiguous']:
+        print(f"   ⚠️  Ambiguous Drive link for {image}: {', '.join(candidates)} (using {candidates[0]})")
+    for link_name, categories in sorted(issues['legacy'].items()):
+        if len(categories) > 1:
+            print(f"   ⚠️  Drive link '{link_name}' matched images in {len(categories)} categories "
+                  f"({', '.join(sorted(categories))}); re-run sync_from_drive.py to disambiguate")
+    if issues['missing']:
+        shown = ', '.join(issues['missing'][:5])
+        more = f" and {len(issues['missing']) - 5} more" if len(issues['missing']) > 5 else ""
+        print(f"   ⚠️  No Drive link for {len(issues['missing'])} images: {shown}{more}")
+
+def load_metadata_cache():
+    """Load cached image metadata, keyed by "<category>/<file>" """
+    if os.path.exists(METADATA_CACHE_PATH):
+        try:
+            with open(METADATA_CACHE_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+def save_metadata_cache(cache):
+    """Write the metadata cache atomically"""
+    tmp_path = METADATA_CACHE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, separators=(',', ':'))
+    os.replace(tmp_path, METADATA_CACHE_PATH)
+
+def extract_metadata(file_path, preview_path=None):
+    """Read dimensions, orientation, dominant colour and an LQIP placeholder
+
+    Dimensions and EXIF orientation come from the header only. The colour
+    and placeholder decode preview_path (a small derivative) when given, or
+    the full file in JPEG draft mode, which decodes at 1/2-1/8 scale.
+    """
+    from PIL import Image
+    
+    with Image.open(file_path) as img:
+        width, height = img.size
+        # EXIF orientations 5-8 are rotated 90°: swap for display size
+        if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+    
+    with Image.open(preview_path or file_path) as img:
+        img.draft('RGB', (PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+        thumb = img.convert('RGB')
+        thumb.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    
+    # Dominant colour: most common entry of a 4-colour palette
+    quantized = thumb.quantize(colors=4)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    
+    buffer = io.BytesIO()
+    thumb.save(buffer, 'JPEG', quality=40)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    
+    if width > height:
+        orientation = 'landscape'
+    elif height > width:
+        orientation = 'portrait'
+    else:
+        orientation = 'square'
+    
+    return {
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+        "placeholder": placeholder,
+    }
+
+def get_metadata(cache, category, file, variants, photos):
+    """Cached extract_metadata(); entries are reused while size/mtime match
+
+    photos is the Inventory of PHOTOS_DIR, so no file is stat()ed again.
+    """
+    file_path = os.path.join(PHOTOS_DIR, category, file)
+    key = f"{category}/{file}"
+    stat = photos.stat(key)
+    entry = cache.get(key)
+    if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+        return entry['metadata']
+    
+    preview_path = None
+    if variants and photos.stat(f"{category}/w{min(variants)}/{file}"):
+        preview_path = os.path.join(PHOTOS_DIR, category, f"w{min(variants)}", file)
+    
+    start = time.perf_counter()
+    try:
+        metadata = extract_metadata(file_path, preview_path)
+    except ImportError:
+        return None
+    except Exception as e:
+        print(f"      ⚠️  Could not read metadata for {file}: {e}")
+        return None
+    
+    cache[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'metadata': metadata}
+    instrumentation.emit('image', stage='scan', image=key, bytes_in=stat.st_size,
+                         decode=round(time.perf_counter() - start, 4))
+    return metadata
+
+def load_build_manifest():
+    """Load optimize_images.py's build manifest, keyed by output path"""
+    manifest_path = os.path.join(PHOTOS_DIR, '.manifest.json')
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    return {entry['output'].replace(os.sep, '/'): entry
+            for entry in manifest.get('files', {}).values() if 'output' in entry}
+
+def load_duplicates():
+    """Near-duplicate sources optimize_images.py aliased instead of encoding
+
+    Returns [{'category', 'name', 'canonical'}] where name is the published
+    name the copy would have had and canonical the kept copy's output path.
+    """
+    manifest_path = os.path.join(PHOTOS_DIR, '.manifest.json')
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, 'r') as f:
+        files = json.load(f).get('files', {})
+    
+    duplicates = []
+    for key, entry in sorted(files.items()):
+        kept = files.get(entry.get('duplicate_of'))
+        if not kept or 'output' not in kept:
+            continue
+        category, source_name = key.split('/', 1)
+        canonical = kept['output'].replace(os.sep, '/')
+        duplicates.append({
+            'category': category,
+            'name': os.path.splitext(source_name)[0] + os.path.splitext(canonical)[1],
+            'canonical': canonical,
+        })
+    return duplicates
+
+def alternate_files(build_manifest):
+    """"<category>/<file>" of every modern-format sibling in the build manifest"""
+    return {
+        f"{os.path.splitext(output)[0]}.{ext}"
+        for output, entry in build_manifest.items()
+        for ext in entry.get('formats', [])
+    }
+
+def scan_photos(drive_links, build_manifest=None, duplicates=None, photos=None):
+    """Scan photo directories and build portfolio data structure
+
+    duplicates (from load_duplicates()) list the kept copy again under each
+    other category the shot was found in, pointing at the same files.
+    photos is an Inventory of PHOTOS_DIR to reuse instead of listing it.
+    """
+    with instrumentation.stage('scan') as stage:
+        portfolio_data = _scan_photos(drive_links, build_manifest or {}, duplicates or [],
+                                      photos or inventory.Inventory(PHOTOS_DIR))
+        stage.set(categories=len(portfolio_data['tabs']),
+                  images=sum(len(tab['images']) for tab in portfolio_data['tabs']))
+    return portfolio_data
+
+def _scan_photos(drive_links, build_manifest, duplicates, photos):
+    """scan_photos() body"""
+    
+    # WebP/AVIF siblings are served through <picture>, not listed as photos
+    alternates = alternate_files(build_manifest)
     portfolio_data = {"tabs": []}
     
     if not os.path.exists(PHOTOS_DIR):
@@ -58,44 +288,69 @@ def scan_photos(drive_links):
         return portfolio_data
     
     # Get all category folders
-    categories = [d for d in os.listdir(PHOTOS_DIR) 
-                 if os.path.isdir(os.path.join(PHOTOS_DIR, d)) and not d.startswith('.')]
+    categories = photos.categories()
     
     print("📸 Scanning Photo Folders...")
     
-    for category in sorted(categories):
-        category_path = os.path.join(PHOTOS_DIR, category)
-        
+    link_index = build_drive_link_index(drive_links)
+    link_issues = {'ambiguous': [], 'missing': [], 'legacy': {}}
+    metadata_cache = load_metadata_cache()
+    live_keys = set()
+    images_by_path = {}
+    
+    for category in categories:
         print(f"   📂 {category}")
         
         # Get all images in this category
         images = []
-        for file in sorted(os.listdir(category_path)):
-            file_path = os.path.join(category_path, file)
-            
-            if os.path.isfile(file_path):
-                ext = os.path.splitext(file.lower())[1]
-                if ext in SUPPORTED_FORMATS:
-                    # Store relative path within site directory
-                    # Images will be copied to site/images/
-                    relative_path = f"images/{category}/{file}"
-                    
-                    # Original filename logic to match drive_links keys
-                    drive_url = drive_links.get(file, "")
-                    
-                    # If conversion changed extension (HEIC -> jpg), try to find original key
-                    if not drive_url:
-                        base_name = os.path.splitext(file)[0]
-                        for link_name, link_url in drive_links.items():
-                            if os.path.splitext(link_name)[0] == base_name:
-                                drive_url = link_url
-                                break
+        for file in photos.listdir(category):
+            ext = os.path.splitext(file.lower())[1]
+            if ext in SUPPORTED_FORMATS and f"{category}/{file}" not in alternates:
+                # Store relative path within site directory
+                # Images will be copied to site/images/
+                relative_path = f"images/{category}/{file}"
+                
+                # Match drive_links keys, including HEIC -> jpg conversions
+                drive_url = resolve_drive_link(drive_links, link_index, category, file, link_issues)
+                
+                image = {
+                    "name": file,
+                    "path": relative_path,
+                    "drive_url": drive_url
+                }
+                
+                # Dimensions, colour and placeholder so the page can reserve space
+                entry = build_manifest.get(f"{category}/{file}")
+                live_keys.add(f"{category}/{file}")
+                metadata = get_metadata(metadata_cache, category, file,
+                                        entry.get("variants") if entry else None, photos)
+                if metadata:
+                    image.update(metadata)
+                
+                # Responsive derivatives produced by optimize_images.py
+                if entry and 'width' in entry:
+                    image.setdefault("width", entry["width"])
+                    image.setdefault("height", entry["height"])
+                    image["variants"] = [
+                        {"width": width, "path": f"images/{category}/w{width}/{file}"}
+                        for width in entry.get("variants", [])
+                    ]
                     
-                    images.append({
-                        "name": file,
-                        "path": relative_path,
-                        "drive_url": drive_url
-                    })
+                    # Modern-format siblings, same layout with a new extension
+                    base_name = os.path.splitext(file)[0]
+                    image["formats"] = {
+                        ext: {
+                            "path": f"images/{category}/{base_name}.{ext}",
+                            "variants": [
+                                {"width": width, "path": f"images/{category}/w{width}/{base_name}.{ext}"}
+                                for width in entry.get("variants", [])
+                            ]
+                        }
+                        for ext in entry.get("formats", [])
+                    }
+                
+                images.append(image)
+                images_by_path[relative_path] = image
         
         if images:
             portfolio_data["tabs"].append({
@@ -106,93 +361,617 @@ def scan_photos(drive_links):
         else:
             print(f"      ⚠️  No images found")
     
+    # Near-duplicates: the kept copy, again, in each other category it was found in
+    aliases = set()
+    tabs = {tab["category"]: tab for tab in portfolio_data["tabs"]}
+    for duplicate in duplicates:
+        kept = images_by_path.get(f"images/{duplicate['canonical']}")
+        category = duplicate['category']
+        if not kept or category == duplicate['canonical'].split('/')[0]:
+            continue  # Same category: listed once
+        
+        tab = tabs.get(category)
+        if tab is None:
+            tab = tabs[category] = {"category": category, "images": []}
+            portfolio_data["tabs"].append(tab)
+        if any(image["path"] == kept["path"] for image in tab["images"]):
+            continue
+        
+        alias = copy.deepcopy(kept)
+        alias["name"] = duplicate['name']
+        alias["drive_url"] = resolve_drive_link(drive_links, link_index, category,
+                                                duplicate['name'], link_issues)
+        tab["images"].append(alias)
+        tab["images"].sort(key=lambda image: image["name"])
+        aliases.add(id(alias))
+    portfolio_data["tabs"].sort(key=lambda tab: tab["category"])
+    if aliases:
+        print(f"   🔗 {len(aliases)} near-duplicates listed as aliases")
+    
+    if drive_links:
+        report_drive_link_issues(link_issues)
+    
+    # Keep the cache in step with what's on disk
+    for key in set(metadata_cache) - live_keys:
+        del metadata_cache[key]
+    save_metadata_cache(metadata_cache)
+    
     import random
     
     # Create a shuffled definition of "All Photos" for the main page
     all_photos_list = []
     for tab in portfolio_data["tabs"]:
-        all_photos_list.extend(tab["images"])
+        all_photos_list.extend(image for image in tab["images"] if id(image) not in aliases)
     
     random.shuffle(all_photos_list)
     portfolio_data["all_images"] = all_photos_list
     
     return portfolio_data
 
+def fingerprint_name(path, content_hash):
+    """IMG_1.jpg + hash → IMG_1.<hash>.jpg"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.{content_hash[:HASH_LENGTH]}{ext}"
+
+def asset_url(url, content):
+    """Fingerprinted URL for generated text content (if FINGERPRINT_ASSETS)"""
+    if not FINGERPRINT_ASSETS:
+        return url
+    return fingerprint_name(url, hashlib.sha256(content.encode('utf-8')).hexdigest())
+
+def fingerprint_images(photos=None):
+    """Map every optimized file ("<category>/...") to its fingerprinted name
+
+    Hashes are cached by size and mtime, so only new or changed outputs are
+    read. Covers main images, derivatives and modern-format siblings.
+    photos is an Inventory of PHOTOS_DIR to reuse instead of walking it.
+    """
+    cache = {}
+    if os.path.exists(FINGERPRINT_CACHE_PATH):
+        try:
+            with open(FINGERPRINT_CACHE_PATH, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+    
+    photos = photos or inventory.Inventory(PHOTOS_DIR)
+    asset_map = {}
+    fresh_cache = {}
+    for category in photos.categories():
+        for sub_path, stat in photos.under(category).items():
+            rel_path = f"{category}/{sub_path}"
+            entry = cache.get(rel_path)
+            if not (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns):
+                entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                         'sha256': file_hash(photos.path(rel_path))}
+            fresh_cache[rel_path] = entry
+            asset_map[rel_path] = fingerprint_name(rel_path, entry['sha256'])
+    
+    tmp_path = FINGERPRINT_CACHE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(fresh_cache, f, separators=(',', ':'))
+    os.replace(tmp_path, FINGERPRINT_CACHE_PATH)
+    return asset_map
+
+def rewrite_image_paths(data, asset_map):
+    """Point every "images/..." path in the portfolio data at its fingerprinted name"""
+    if isinstance(data, list):
+        for item in data:
+            rewrite_image_paths(item, asset_map)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if key == 'path' and isinstance(value, str) and value.startswith('images/'):
+                rel_path = value[len('images/'):]
+                data[key] = 'images/' + asset_map.get(rel_path, rel_path)
+            else:
+                rewrite_image_paths(value, asset_map)
+
+def profile_picture_name(config):
+    """Published file name of the profile picture (fingerprinted if enabled)"""
+    profile_pic = config.get('profile_picture')
+    if not profile_pic:
+        return None
+    src = os.path.join(BASE_DIR, 'photos', profile_pic)
+    if not FINGERPRINT_ASSETS or not os.path.exists(src):
+        return profile_pic
+    return fingerprint_name(profile_pic, file_hash(src))
+
+def write_headers():
+    """Emit a Cloudflare Pages _headers file with per-path cache rules"""
+    rules = [('/', ENTRY_CACHE), ('/index.html', ENTRY_CACHE)]
+    if FINGERPRINT_ASSETS:
+        rules += [('/assets/*', IMMUTABLE_CACHE), ('/images/*', IMMUTABLE_CACHE),
+                  ('/data/*', IMMUTABLE_CACHE)]
+    content = "# Generated by generate_site.py\n"
+    for path, cache_control in rules:
+        content += f"{path}\n  Cache-Control: {cache_control}\n"
+    write_if_changed(os.path.join(SITE_DIR, '_headers'), content)
+    print(f"   ✓ _headers ({'immutable hashed assets' if FINGERPRINT_ASSETS else 'entry point only'})")
+
 def setup_site_directory():
     """Create site directory if it doesn't exist"""
     os.makedirs(SITE_DIR, exist_ok=True)
 
+def dump_compact(data):
+    """JSON with no whitespace"""
+    return json.dumps(data, separators=(',', ':'))
+
+def write_if_changed(path, content):
+    """Write content unless the file already holds exactly that (no git churn)"""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+def single_data(portfolio_data):
+    """data.json payload with all_images as [tab, index] references
+
+    Images are matched to their tab entry by identity, falling back to path
+    and name for data that went through a JSON round trip (the benchmark's
+    scan → data hand-off), where the objects are copies.
+    """
+    positions = {}
+    by_path = {}
+    for tab_index, tab in enumerate(portfolio_data["tabs"]):
+        for image_index, image in enumerate(tab["images"]):
+            positions[id(image)] = [tab_index, image_index]
+            by_path.setdefault((image["path"], image["name"]), [tab_index, image_index])
+    return {
+        "tabs": portfolio_data["tabs"],
+        "all_images": [positions.get(id(image)) or by_path[(image["path"], image["name"])]
+                       for image in portfolio_data["all_images"]],
+    }
+
+def shard_pages(images):
+    """Split a list of images into PAGE_SIZE pages"""
+    return [images[i:i + PAGE_SIZE] for i in range(0, len(images), PAGE_SIZE)]
+
+def shard_slugs(categories):
+    """URL-safe, unique shard folder names for categories, in order
+
+    Drive folder names can hold '#', '?' or spaces, which would break the
+    shard URLs. Slugs never start with '_', so the ALL PHOTOS folder
+    (_all) can't be claimed by a category.
+    """
+    slugs = []
+    used = set()
+    for category in categories:
+        base = re.sub(r'[^A-Za-z0-9._-]+', '-', category).strip('-_.') or 'tab'
+        slug, n = base, 2
+        while slug.lower() in used:
+            slug, n = f"{base}-{n}", n + 1
+        used.add(slug.lower())
+        slugs.append(slug)
+    return slugs
+
+def generate_sharded_data(portfolio_data):
+    """Build data/manifest.json plus one compact shard per tab page
+
+    The manifest lists each tab's count and shard URLs; the gallery fetches
+    shards as visitors page through. ALL PHOTOS pages hold their own image
+    objects so every page is a single request. Returns ({url: content},
+    manifest url).
+    """
+    files = {}
+    
+    def add_tab(name, slug, images):
+        shards = []
+        for page_number, page in enumerate(shard_pages(images)):
+            content = dump_compact(page)
+            url = asset_url(f"data/{slug}/{page_number}.json", content)
+            files[url] = content
+            shards.append(url)
+        return {"category": name, "count": len(images), "shards": shards}
+    
+    slugs = shard_slugs([tab["category"] for tab in portfolio_data["tabs"]])
+    manifest = {
+        "page_size": PAGE_SIZE,
+        "all": add_tab("ALL PHOTOS", "_all", portfolio_data["all_images"]),
+        "tabs": [add_tab(tab["category"], slug, tab["images"])
+                 for tab, slug in zip(portfolio_data["tabs"], slugs)],
+    }
+    content = dump_compact(manifest)
+    manifest_url = asset_url("data/manifest.json", content)
+    files[manifest_url] = content
+    return files, manifest_url
+
 def generate_data_json(portfolio_data):
-    """Generate data.json file"""
-    output_path = os.path.join(SITE_DIR, 'data.json')
+    """Generate data.json, or the sharded manifest + pages (DATA_MODE)
+
+    Returns the URL the gallery should fetch first.
+    """
+    single_payload = dump_compact(single_data(portfolio_data))
+    data_dir = os.path.join(SITE_DIR, 'data')
+    
+    if DATA_MODE == 'sharded':
+        files, entry_url = generate_sharded_data(portfolio_data)
+    else:
+        # Fingerprinted copies live under data/ with the shards' cache rules
+        entry_url = asset_url('data/data.json', single_payload) if FINGERPRINT_ASSETS else 'data.json'
+        files = {entry_url: single_payload}
+    
+    for url, content in files.items():
+        write_if_changed(os.path.join(SITE_DIR, url), content)
     
-    with open(output_path, 'w') as f:
-        json.dump(portfolio_data, f, indent=2)
+    # Remove shards from pages/categories/builds that no longer exist
+    # (with their .gz/.br siblings; those of live files are kept)
+    expected = {os.path.normpath(os.path.join(SITE_DIR, url)) for url in files}
+    for root, dirs, filenames in os.walk(data_dir, topdown=False):
+        for filename in filenames:
+            path = os.path.normpath(os.path.join(root, filename))
+            if compressed_source(path) not in expected:
+                os.remove(path)
+        if not os.listdir(root):
+            os.rmdir(root)
+    legacy_path = os.path.join(SITE_DIR, 'data.json')
+    if 'data.json' not in files and os.path.exists(legacy_path):
+        os.remove(legacy_path)
     
-    print(f"✅ Generated: {output_path}")
+    if DATA_MODE != 'sharded':
+        print(f"✅ Generated: {os.path.join(SITE_DIR, entry_url)} ({len(single_payload) / 1024:.1f} KB)")
+        return entry_url
+    
+    manifest_size = len(files[entry_url])
+    shard_sizes = [len(content) for url, content in files.items() if url != entry_url]
+    first_all_shards = json.loads(files[entry_url])["all"]["shards"][:1]
+    first_all_page = sum(len(files[url]) for url in first_all_shards)
+    print(f"✅ Generated: {os.path.join(SITE_DIR, entry_url)} + {len(shard_sizes)} shards")
+    print(f"   Manifest: {manifest_size / 1024:.1f} KB, "
+          f"shards: {sum(shard_sizes) / 1024:.1f} KB total, "
+          f"largest {max(shard_sizes, default=0) / 1024:.1f} KB")
+    print(f"   First paint: {(manifest_size + first_all_page) / 1024:.1f} KB "
+          f"(vs {len(single_payload) / 1024:.1f} KB for a single data.json)")
+    return entry_url
+
+def copy_frontend_files(config, data_url='data/manifest.json', profile_name=None):
+    """Copy and template HTML, CSS, JS files to site directory
 
-def copy_frontend_files(config):
-    """Copy and template HTML, CSS, JS files to site directory"""
+    With FINGERPRINT_ASSETS, style.css and script.js are published as
+    assets/<name>.<hash>.<ext>, and the asset, data and profile picture URLs
+    in index.html are rewritten to match. The data URL lives only in
+    index.html, so the script's fingerprint depends on its source alone.
+    """
     print("\n📋 Processing Frontend Files...")
     
-    # Process index.html with config substitutions
-    index_path = os.path.join(SRC_DIR, 'index.html')
-    if os.path.exists(index_path):
-        with open(index_path, 'r') as f:
-            content = f.read()
-        
-        # Substitute placeholders
-        content = content.replace('Your Name', config['name'])
-        
-        # Hyperlink the handle using config URL
-        handle = config['handle']
-        insta_url = config['instagram_url']
-        
-        if insta_url:
-             linked_handle = f'<a href="{insta_url}" target="_blank" style="text-decoration: none; color: inherit;">{handle}</a>'
-             content = content.replace('@YourHandle', linked_handle)
-             # Also replace standalone URL placeholder for icon
-             content = content.replace('INSTAGRAM_URL_PLACEHOLDER', insta_url)
-        else:
-             content = content.replace('@YourHandle', handle)
-             content = content.replace('INSTAGRAM_URL_PLACEHOLDER', '#')
-        
-        # Handle profile picture
-        profile_pic_filename = config.get('profile_picture')
-        profile_pic_path = os.path.join(BASE_DIR, 'photos', profile_pic_filename) if profile_pic_filename else None
+    assets_dir = os.path.join(SITE_DIR, 'assets')
+    asset_urls = {}
+    
+    # Copy CSS/JS
+    for file in ['style.css', 'script.js']:
+        src_file = os.path.join(SRC_DIR, file)
+        if not os.path.exists(src_file):
+            print(f"   ⚠️  {file} not found - skipping")
+            continue
         
-        if profile_pic_path and os.path.exists(profile_pic_path):
-            # Using style injection for background image
-            css_injection = f"""<style>
-                .profile-image {{
-                    background-image: url('images/{profile_pic_filename}');
-                    background-size: cover;
-                    background-position: center;
-                }}
-                .profile-image::before {{ content: none !important; }}
-            </style>
-            </head>"""
-            content = content.replace('</head>', css_injection)
+        with open(src_file, 'r') as f:
+            content = f.read()
+        if MINIFY_ASSETS:
+            content = minify_css(content) if file.endswith('.css') else minify_js(content)
         
-        with open(os.path.join(SITE_DIR, 'index.html'), 'w') as f:
-            f.write(content)
+        url = asset_url(f"assets/{file}", content) if FINGERPRINT_ASSETS else file
+        write_if_changed(os.path.join(SITE_DIR, url), content)
+        asset_urls[file] = url
+        print(f"   ✓ {url}")
+    
+    # Drop assets from previous builds (or all of them when not fingerprinting)
+    if os.path.exists(assets_dir):
+        for file in os.listdir(assets_dir):
+            if compressed_source(f"assets/{file}") not in asset_urls.values():
+                os.remove(os.path.join(assets_dir, file))
+        if not os.listdir(assets_dir):
+            os.rmdir(assets_dir)
+    if FINGERPRINT_ASSETS:
+        for file in ['style.css', 'script.js']:
+            if os.path.exists(os.path.join(SITE_DIR, file)):
+                os.remove(os.path.join(SITE_DIR, file))
+    
+    # Process index.html with config substitutions
+    content = render_index(config, asset_urls, profile_name, data_url)
+    if content is not None:
+        write_if_changed(os.path.join(SITE_DIR, 'index.html'), content)
         print("   ✓ index.html (customized)")
 
-    # Copy other files directly
-    for file in ['style.css', 'script.js']:
-        src_file = os.path.join(SRC_DIR, file)
-        if os.path.exists(src_file):
-            dest = os.path.join(SITE_DIR, file)
-            shutil.copy2(src_file, dest)
-            print(f"   ✓ {file}")
-        else:
-            print(f"   ⚠️  {file} not found - skipping")
+def render_index(config, asset_urls=None, profile_name=None, data_url=None):
+    """src/index.html with the config substituted, or None if it's missing
+
+    asset_urls maps style.css/script.js to their published URLs; data_url
+    is the data entry point the gallery loads (default: data.json).
+    """
+    asset_urls = asset_urls or {}
+    index_path = os.path.join(SRC_DIR, 'index.html')
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'r') as f:
+        content = f.read()
+    
+    # Substitute placeholders
+    content = content.replace('Your Name', config['name'])
+    
+    # Hyperlink the handle using config URL
+    handle = config['handle']
+    insta_url = config['instagram_url']
+    
+    if insta_url:
+         linked_handle = f'<a href="{insta_url}" target="_blank" style="text-decoration: none; color: inherit;">{handle}</a>'
+         content = content.replace('@YourHandle', linked_handle)
+         # Also replace standalone URL placeholder for icon
+         content = content.replace('INSTAGRAM_URL_PLACEHOLDER', insta_url)
+    else:
+         content = content.replace('@YourHandle', handle)
+         content = content.replace('INSTAGRAM_URL_PLACEHOLDER', '#')
+    
+    # Point at this build's stylesheet and script
+    if 'style.css' in asset_urls:
+        content = content.replace('href="style.css"', f'href="{asset_urls["style.css"]}"')
+    if 'script.js' in asset_urls:
+        content = content.replace('src="script.js"', f'src="{asset_urls["script.js"]}"')
+    if data_url:
+        content = content.replace('data-portfolio="data.json"', f'data-portfolio="{data_url}"')
+    
+    # Handle profile picture
+    profile_pic_filename = config.get('profile_picture')
+    profile_pic_path = os.path.join(BASE_DIR, 'photos', profile_pic_filename) if profile_pic_filename else None
+    
+    if profile_pic_path and os.path.exists(profile_pic_path):
+        # Using style injection for background image
+        css_injection = f"""<style>
+            .profile-image {{
+                background-image: url('images/{profile_name or profile_pic_filename}');
+                background-size: cover;
+                background-position: center;
+            }}
+            .profile-image::before {{ content: none !important; }}
+        </style>
+        </head>"""
+        content = content.replace('</head>', css_injection)
+    return content
+
+CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+
+def minify_css(text):
+    """Drop comments and collapse whitespace around CSS punctuation
+
+    Quoted strings are copied as they are. Whitespace is only removed after
+    a colon, never before it, so descendant pseudo-class selectors
+    (`.a :hover`) keep their meaning.
+    """
+    def collapse(chunk):
+        chunk = re.sub(r'\s+', ' ', chunk)
+        chunk = re.sub(r'\s*([{};,>])\s*', r'\1', chunk)
+        return re.sub(r':\s+', ':', chunk).replace(';}', '}')
+    
+    text = re.sub(rf'({CSS_STRING})|/\*.*?\*/', lambda m: m.group(1) or ' ', text, flags=re.S)
+    parts = re.split(rf'({CSS_STRING})', text)
+    # re.split puts the captured strings at the odd indexes
+    return ''.join(part if i % 2 else collapse(part) for i, part in enumerate(parts)).strip()
+
+def minify_js(text):
+    """Conservative JS minify: drop indentation, blank and comment-only lines
+
+    Newlines are kept so automatic semicolon insertion behaves as before.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+def compressed_source(path):
+    """The file a .gz/.br sibling was made from (path itself otherwise)"""
+    base, ext = os.path.splitext(path)
+    return base if ext in ('.gz', '.br') else path
+
+def compress_file(path):
+    """Write <path>.gz and <path>.br at maximum compression
+
+    Output is deterministic (no gzip timestamp) so unchanged assets don't
+    churn git. .br is skipped when the brotli module isn't installed.
+    Returns (original, gzip, brotli-or-None) sizes.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gz_data)
+    
+    br_size = None
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli:
+        br_data = brotli.compress(data, quality=11)
+        with open(path + '.br', 'wb') as f:
+            f.write(br_data)
+        br_size = len(br_data)
+    
+    return len(data), len(gz_data), br_size
+
+def is_compressed_fresh(path):
+    """Both siblings exist and are at least as new as the file"""
+    mtime = os.path.getmtime(path)
+    siblings = [path + '.gz']
+    try:
+        import brotli  # noqa: F401
+        siblings.append(path + '.br')
+    except ImportError:
+        pass
+    return all(os.path.exists(sibling) and os.path.getmtime(sibling) >= mtime
+               for sibling in siblings)
+
+def precompress_site():
+    """Write .gz/.br siblings for changed text assets, in parallel"""
+    print("\n🗜️  Precompressing Text Assets...")
+    
+    targets = []
+    skipped = 0
+    for root, dirs, files in os.walk(SITE_DIR):
+        dirs[:] = [d for d in dirs if d != 'images']
+        for file in files:
+            path = os.path.join(root, file)
+            ext = os.path.splitext(file)[1].lower()
+            
+            # Siblings whose asset was removed or renamed
+            if ext in ('.gz', '.br'):
+                if not os.path.exists(path[:-len(ext)]):
+                    os.remove(path)
+                continue
+            
+            if ext not in COMPRESSED_EXTENSIONS or os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            if is_compressed_fresh(path):
+                skipped += 1
+            else:
+                targets.append(path)
+    
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        results = list(executor.map(compress_file, targets))
+    
+    totals = {}
+    for path, (size, gz_size, br_size) in zip(targets, results):
+        ext = os.path.splitext(path)[1].lower()
+        total = totals.setdefault(ext, {'files': 0, 'size': 0, 'gz': 0, 'br': 0, 'has_br': br_size is not None})
+        total['files'] += 1
+        total['size'] += size
+        total['gz'] += gz_size
+        total['br'] += br_size or 0
+    
+    for ext, total in sorted(totals.items()):
+        line = (f"   ✓ {ext:<6} {total['files']:4d} files  {total['size'] / 1024:8.1f} KB"
+                f"  gzip {total['gz'] / total['size'] * 100:5.1f}%")
+        if total['has_br']:
+            line += f"  brotli {total['br'] / total['size'] * 100:5.1f}%"
+        print(line)
+    if skipped:
+        print(f"   ⏭️  {skipped} files unchanged")
+    if targets and not any(total['has_br'] for total in totals.values()):
+        print("   ⚠️  brotli not installed - only .gz written (pip install brotli)")
 
-def copy_images(config):
-    """Copy optimized images and profile pic to site/images/ directory"""
+def file_hash(path):
+    """SHA-256 of a file's contents, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def files_identical(src, dest, src_stat=None, dest_stat=None):
+    """Cheap checks first (same inode, size + mtime), hash only on doubt
+
+    src_stat/dest_stat are cached os.stat() results, when already known.
+    """
+    if dest_stat is None:
+        if not os.path.exists(dest):
+            return False
+        dest_stat = os.stat(dest)
+    src_stat = src_stat or os.stat(src)
+    if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    return file_hash(src) == file_hash(dest)
+
+def reflink(src, dest):
+    """Copy-on-write clone (Linux FICLONE); raises OSError if unsupported"""
+    import fcntl
+    FICLONE = 0x40049409
+    with open(src, 'rb') as s, open(dest, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, dest)
+
+def place_file(src, dest):
+    """Atomically put src at dest by hardlink/reflink, else copy
+
+    Returns 'linked' when no file data was written, 'copied' otherwise.
+    """
+    tmp_path = dest + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    method = 'copied'
+    try:
+        if LINK_MODE == 'hardlink':
+            os.link(src, tmp_path)
+            method = 'linked'
+        elif LINK_MODE == 'reflink':
+            reflink(src, tmp_path)
+            method = 'linked'
+    except (OSError, ImportError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if method == 'copied':
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dest)
+    return method
+
+def sync_file(src, dest, stats, src_stat=None, dest_stat=None):
+    """Update dest from src only if it differs; tallies bytes in stats"""
+    src_stat = src_stat or os.stat(src)
+    size = src_stat.st_size
+    if files_identical(src, dest, src_stat, dest_stat):
+        stats['bytes_skipped'] += size
+        return False
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if place_file(src, dest) == 'linked':
+        stats['bytes_linked'] += size
+    else:
+        stats['bytes_written'] += size
+    stats['files_updated'] += 1
+    return True
+
+def sync_tree(source, dest, rel_dir, stats, rename=None):
+    """Mirror rel_dir of one Inventory into another: update changed files, delete orphans
+
+    Both inventories are listings taken before the sync, so neither tree is
+    walked or stat()ed again. rename, if given, maps a path relative to
+    rel_dir ('/'-separated) to its published one.
+    """
+    existing = dest.under(rel_dir)
+    expected = set()
+    for rel_path, stat in sorted(source.under(rel_dir).items()):
+        published = rename(rel_path) if rename else rel_path
+        expected.add(published)
+        sync_file(source.path(f"{rel_dir}/{rel_path}"), dest.path(f"{rel_dir}/{published}"),
+                  stats, stat, existing.get(published))
+    
+    # Remove files (and then empty folders) the source no longer has
+    for rel_path in sorted(set(existing) - expected):
+        os.remove(dest.path(f"{rel_dir}/{rel_path}"))
+        stats['files_deleted'] += 1
+    for sub_dir in dest.subdirs(rel_dir):
+        try:
+            os.rmdir(dest.path(f"{rel_dir}/{sub_dir}"))
+        except OSError:
+            pass  # Still has files
+
+def copy_images(config, asset_map=None, profile_name=None, photos=None, build_manifest=None):
+    """Sync optimized images and profile pic into site/images/
+
+    Only new or changed files are linked/copied, and files that no longer
+    exist in optimized/ (including whole categories) are deleted. asset_map
+    (from fingerprint_images()) renames files to their fingerprinted names.
+    photos is an Inventory of PHOTOS_DIR to reuse instead of walking it;
+    build_manifest (from load_build_manifest()) keeps modern-format
+    siblings out of the image counts.
+    """
+    if build_manifest is None:
+        build_manifest = load_build_manifest()
+    stats = {'bytes_written': 0, 'bytes_linked': 0, 'bytes_skipped': 0,
+             'files_updated': 0, 'files_deleted': 0}
+    with instrumentation.stage('copy', link_mode=LINK_MODE) as stage:
+        _copy_images(config, asset_map or {}, profile_name, stats, photos,
+                     alternate_files(build_manifest))
+        stage.set(bytes_out=stats['bytes_written'], **{key: value for key, value in stats.items()
+                                                      if key != 'bytes_written'})
+
+def _copy_images(config, asset_map, profile_name, stats, photos, alternates):
+    """copy_images() body; stats collects bytes and file counts"""
     images_dir = os.path.join(SITE_DIR, 'images')
     
-    print("\n📸 Copying Images to Site...")
+    print("\n📸 Syncing Images to Site...")
     
     if not os.path.exists(PHOTOS_DIR):
         print(f"   ⚠️  {PHOTOS_DIR}/ not found - skipping")
@@ -201,39 +980,62 @@ def copy_images(config):
     # Create images directory
     os.makedirs(images_dir, exist_ok=True)
     
-    total_copied = 0
+    total_images = 0
     
-    # Copy all category folders
-    for category in os.listdir(PHOTOS_DIR):
-        category_src = os.path.join(PHOTOS_DIR, category)
-        
-        if not os.path.isdir(category_src):
-            continue
-        
-        category_dest = os.path.join(images_dir, category)
+    # One listing of each side; sync_tree() works from these
+    photos = photos or inventory.Inventory(PHOTOS_DIR)
+    published = inventory.Inventory(images_dir)
+    categories = photos.categories()
+    
+    # Sync each category folder
+    for category in categories:
+        def published_name(rel_path, category=category):
+            key = f"{category}/{rel_path}"
+            return asset_map.get(key, key)[len(category) + 1:]
         
-        # Copy entire category folder
-        if os.path.exists(category_dest):
-            shutil.rmtree(category_dest)
-        shutil.copytree(category_src, category_dest)
+        updated_before = stats['files_updated']
+        sync_tree(photos, published, category, stats, rename=published_name)
         
-        # Count images
-        images = [f for f in os.listdir(category_dest) 
-                 if os.path.splitext(f.lower())[1] in SUPPORTED_FORMATS]
-        total_copied += len(images)
-        print(f"   ✓ {category}: {len(images)} images")
+        # Count images (not their WebP/AVIF siblings)
+        images = [f for f in photos.listdir(category)
+                 if os.path.splitext(f.lower())[1] in SUPPORTED_FORMATS
+                 and f"{category}/{f}" not in alternates]
+        total_images += len(images)
+        print(f"   ✓ {category}: {len(images)} images "
+              f"({stats['files_updated'] - updated_before} files updated)")
+    
+    # Remove categories that no longer exist
+    for entry in published.categories():
+        if entry not in categories:
+            shutil.rmtree(published.path(entry))
+            print(f"   🗑️  {entry} (category removed)")
     
     # Copy profile picture
     profile_pic = config.get('profile_picture')
+    profile_name = profile_name or profile_pic
     if profile_pic:
         src = os.path.join(BASE_DIR, 'photos', profile_pic)
         if os.path.exists(src):
-            shutil.copy2(src, os.path.join(images_dir, profile_pic))
-            print(f"   ✓ Profile picture copied: {profile_pic}")
+            sync_file(src, os.path.join(images_dir, profile_name), stats)
+            print(f"   ✓ Profile picture synced: {profile_name}")
         else:
              print(f"   ⚠️ Profile picture not found at: {src}")
+    
+    # Old fingerprinted copies of the profile picture
+    for entry in published.listdir(''):
+        if entry != profile_name:
+            os.remove(published.path(entry))
+            stats['files_deleted'] += 1
 
-    print(f"\n   Total: {total_copied} images copied to site/")
+    mb_written = stats['bytes_written'] / (1024 * 1024)
+    mb_linked = stats['bytes_linked'] / (1024 * 1024)
+    mb_skipped = stats['bytes_skipped'] / (1024 * 1024)
+    print(f"\n   Total: {total_images} images in site/")
+    print(f"   Updated: {stats['files_updated']} files "
+          f"({mb_written:.1f} MB written, {mb_linked:.1f} MB linked)")
+    print(f"   Unchanged: {mb_skipped:.1f} MB skipped")
+    if stats['files_deleted']:
+        print(f"   Deleted: {stats['files_deleted']} orphaned files")
 
 def create_gitignore():
     """Create .gitignore for the project"""
@@ -248,6 +1050,12 @@ venv/
 # Optimized images (can be regenerated)
 optimized/
 
+# Build profiles (--profile)
+profiles/
+
+# Preview server cache (python -m scripts preview)
+.preview_cache/
+
 # Downloaded photos (synced from Google Drive)
 photos/*
 !photos/README.md
@@ -274,6 +1082,7 @@ config.json
 *.json
 !package.json
 !site/data.json
+!site/data/**
 !config.example.json
 
 # Generated Metadata
@@ -285,6 +1094,11 @@ drive_links.json
     
     print(f"✅ Created: .gitignore")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static portfolio site")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
 def main():
     """Main site generation process"""
     print("🚀 Portfolio Site Generator")
@@ -294,10 +1108,15 @@ def main():
     # Load Config and Drive Links
     config = load_config()
     drive_links = load_drive_links()
+    build_manifest = load_build_manifest()
     print(f"👤 Customizing for: {config.get('name')}")
     
+    # One listing of optimized/, shared by the scan, fingerprint and copy stages
+    photos = inventory.Inventory(PHOTOS_DIR)
+    
     # Scan photos and build data structure
-    portfolio_data = scan_photos(drive_links=drive_links)
+    portfolio_data = scan_photos(drive_links=drive_links, build_manifest=build_manifest,
+                                 duplicates=load_duplicates(), photos=photos)
     
     if not portfolio_data["tabs"]:
         print("\n❌ No photos found!")
@@ -311,14 +1130,23 @@ def main():
     # Create site directory
     setup_site_directory()
     
+    # Fingerprint images so data.json points at content-hashed names
+    asset_map = fingerprint_images(photos) if FINGERPRINT_ASSETS else {}
+    rewrite_image_paths(portfolio_data, asset_map)
+    profile_name = profile_picture_name(config)
+    
     # Generate data.json
-    generate_data_json(portfolio_data)
+    data_url = generate_data_json(portfolio_data)
     
     # Copy frontend files (with customization)
-    copy_frontend_files(config)
+    copy_frontend_files(config, data_url, profile_name)
+    write_headers()
     
     # Copy images to site directory
-    copy_images(config)
+    copy_images(config, asset_map, profile_name, photos, build_manifest)
+    
+    # Precompress text assets for static hosting
+    precompress_site()
     
     # Create .gitignore
     create_gitignore()
@@ -337,5 +1165,10 @@ def main():
     print("   Then visit: http://localhost:8000")
     print()
 
-if __name__ == '__main__':
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts build`"""
+    instrumentation.configure_from_args(parse_args(argv))
     main()
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,277 @@
+"""
+Imaging Backends
+The decode, resize and encode steps optimize_image() needs, implemented
+on Pillow (the default) and optionally on libvips through pyvips
+"""
+
+import os
+
+BACKEND_ENV = 'PORTFOLIO_BACKEND'   # Read by worker processes too, like instrumentation's settings
+DEFAULT_BACKEND = 'pillow'
+BACKENDS = ['pillow', 'vips']
+RESIZE_REDUCING_GAP = 2.0           # Pillow: box-reduce first when shrinking by more than this
+BACKGROUND = (255, 255, 255)        # Transparent pixels are flattened onto white
+
+HEIF_FORMATS = {'.heic', '.heif'}   # Need pillow_heif's opener, registered on first use
+ENCODERS = ['JPEG', 'PNG', 'WEBP', 'AVIF']
+
+_heif_registered = False
+
+def ensure_opener(path):
+    """Register pillow_heif with Pillow the first time a HEIC/HEIF is opened"""
+    global _heif_registered
+    if not _heif_registered and os.path.splitext(path.lower())[1] in HEIF_FORMATS:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+        _heif_registered = True
+
+def configure(name):
+    """Select the backend for this process and its children"""
+    if name:
+        os.environ[BACKEND_ENV] = name
+
+def add_arguments(parser):
+    """Add --backend to a script's argument parser"""
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help=f"Imaging library used to resize and encode (default: {backend_name()})")
+
+def configure_from_args(args):
+    configure(args.backend)
+
+def backend_name():
+    return os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+
+# --- Pillow ---
+
+class PillowSource:
+    """A source image whose pixels haven't been decoded yet"""
+
+    def __init__(self, path):
+        from PIL import Image
+        ensure_opener(path)
+        self.img = Image.open(path)
+        self.format = self.img.format
+        self.size = self.img.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.img.close()
+
+    @property
+    def decoded_size(self):
+        return self.img.size
+
+    def shrink_on_load(self, target, gap):
+        """Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 toward target
+
+        The decode stays at least gap times the target so the final LANCZOS
+        resize keeps its quality. Other formats decode at full size.
+        """
+        if gap and self.format == 'JPEG' and target != self.size:
+            self.img.draft(self.img.mode, (round(target[0] * gap), round(target[1] * gap)))
+
+    def load(self, flatten):
+        """Decode, converting to RGB (alpha flattened onto white) if flatten"""
+        from PIL import Image
+        img = self.img
+        img.load()
+        if not flatten:
+            return img
+        if img.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', img.size, BACKGROUND)
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1])
+            return background
+        if img.mode != 'RGB':
+            return img.convert('RGB')
+        return img
+
+class PillowBackend:
+    """Decode, resize and encode with Pillow (plus pillow_heif for HEIC)"""
+
+    name = 'pillow'
+
+    def open(self, path):
+        return PillowSource(path)
+
+    def encoders(self):
+        from PIL import Image
+        Image.init()
+        return {fmt for fmt in ENCODERS if fmt in Image.SAVE}
+
+    def size(self, img):
+        return img.size
+
+    def resize(self, img, size, reducing_gap=None):
+        from PIL import Image
+        return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=reducing_gap)
+
+    def save_options(self, output_format, quality):
+        options = {'optimize': True} if output_format in ('JPEG', 'PNG') else {}
+        if quality is not None:
+            options['quality'] = quality
+        return options
+
+    def save(self, img, path, output_format, quality=None):
+        img.save(path, output_format, **self.save_options(output_format, quality))
+
+    def to_bytes(self, img, output_format, quality=None):
+        """Encode in memory exactly as save() would write the file"""
+        import io
+        buffer = io.BytesIO()
+        img.save(buffer, output_format, **self.save_options(output_format, quality))
+        return buffer.getvalue()
+
+    def decode(self, data):
+        import io
+        from PIL import Image
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img
+
+    def planes(self, img):
+        """[Y, Cb, Cr] as (width, height, bytes) planes, chroma at half size like JPEG's"""
+        from PIL import Image
+        y, cb, cr = img.convert('YCbCr').split()
+        half = (max(1, img.width // 2), max(1, img.height // 2))
+        return [(plane.width, plane.height, plane.tobytes())
+                for plane in (y, cb.resize(half, Image.Resampling.BOX),
+                              cr.resize(half, Image.Resampling.BOX))]
+
+# --- libvips ---
+
+YCC_MATRIX = [[0.299, 0.587, 0.114],            # JFIF RGB → YCbCr, before the +128 offset
+              [-0.168736, -0.331264, 0.5],
+              [0.5, -0.418688, -0.081312]]
+VIPS_LOADERS = {'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP', 'heif': 'HEIF'}
+
+class VipsSource:
+    """A source image opened lazily by libvips
+
+    shrink_on_load() swaps the image for a thumbnail pipeline, which uses
+    the JPEG/WebP/HEIF shrink-on-load support and streams the resize, so
+    the full-resolution pixels are never held in memory at once.
+    """
+
+    def __init__(self, path):
+        import pyvips
+        self.path = path
+        self.img = pyvips.Image.new_from_file(path, access='sequential')
+        loader = self.img.get('vips-loader') if self.img.get_typeof('vips-loader') else ''
+        self.format = next((fmt for prefix, fmt in VIPS_LOADERS.items() if loader.startswith(prefix)), None)
+        self.size = (self.img.width, self.img.height)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.img = None
+
+    @property
+    def decoded_size(self):
+        return (self.img.width, self.img.height)
+
+    def shrink_on_load(self, target, gap):
+        # libvips picks its own shrink factor; gap only applies to Pillow
+        if target != self.size:
+            import pyvips
+            # Pillow doesn't apply EXIF orientation either; size='force' gives
+            # exactly the target both backends compute
+            self.img = pyvips.Image.thumbnail(self.path, target[0], height=target[1],
+                                              size='force', no_rotate=True)
+
+    def load(self, flatten):
+        """Render into memory as 8-bit sRGB, alpha flattened onto white if flatten"""
+        img = self.img
+        if img.interpretation != 'srgb':
+            img = img.colourspace('srgb')
+        if flatten and img.hasalpha():
+            img = img.flatten(background=list(BACKGROUND))
+        if img.format != 'uchar':
+            img = img.cast('uchar')
+        # Every output (formats × derivatives) reuses this buffer instead of
+        # re-running the decode pipeline per save
+        return img.copy_memory()
+
+class VipsBackend:
+    """Decode, resize and encode with libvips through pyvips"""
+
+    name = 'vips'
+    SAVE_SUFFIXES = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'AVIF': '.avif'}
+
+    def __init__(self):
+        import pyvips
+        # Worker processes are long-lived; don't let the operation cache pin images
+        pyvips.cache_set_max(0)
+
+    def open(self, path):
+        return VipsSource(path)
+
+    def encoders(self):
+        import pyvips
+        suffixes = set(pyvips.base.get_suffixes())
+        return {fmt for fmt, suffix in self.SAVE_SUFFIXES.items() if suffix in suffixes}
+
+    def size(self, img):
+        return (img.width, img.height)
+
+    def resize(self, img, size, reducing_gap=None):
+        return img.resize(size[0] / img.width, vscale=size[1] / img.height, kernel='lanczos3')
+
+    def save_options(self, output_format, quality):
+        # Metadata is stripped and 4:2:0 chroma subsampling kept at every
+        # quality, as Pillow does
+        if output_format == 'JPEG':
+            return {'Q': quality or 75, 'optimize_coding': True, 'subsample_mode': 'on', 'strip': True}
+        if output_format == 'PNG':
+            return {'compression': 9, 'strip': True}
+        if output_format == 'WEBP':
+            return {'Q': quality or 80, 'strip': True}
+        if output_format == 'AVIF':
+            return {'Q': quality or 50, 'compression': 'av1', 'strip': True}
+        raise ValueError(f"vips backend can't write {output_format}")
+
+    def save(self, img, path, output_format, quality=None):
+        # write_to_file() would pick the saver from path's extension, which
+        # is .tmp while optimize_images writes atomically
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes(img, output_format, quality))
+
+    def to_bytes(self, img, output_format, quality=None):
+        """Encode in memory exactly as save() would write the file"""
+        return img.write_to_buffer(self.SAVE_SUFFIXES[output_format],
+                                   **self.save_options(output_format, quality))
+
+    def decode(self, data):
+        import pyvips
+        return pyvips.Image.new_from_buffer(data, '')
+
+    def planes(self, img):
+        """[Y, Cb, Cr] as (width, height, bytes) planes, chroma at half size like JPEG's"""
+        if img.interpretation != 'srgb':
+            img = img.colourspace('srgb')
+        ycc = img[:3].recomb(YCC_MATRIX) + [0, 128, 128]
+        chroma = ycc[1:].shrink(2, 2) if img.width > 1 and img.height > 1 else ycc[1:]
+        return [(plane.width, plane.height, plane.cast('uchar').write_to_memory())
+                for plane in (ycc[0], chroma[0], chroma[1])]
+
+_backends = {}
+
+def get_backend(name=None):
+    """The backend instance for name (default: the configured one)"""
+    name = name or backend_name()
+    if name not in _backends:
+        if name == 'pillow':
+            _backends[name] = PillowBackend()
+        elif name == 'vips':
+            try:
+                _backends[name] = VipsBackend()
+            except ImportError:
+                raise RuntimeError("the vips backend needs pyvips and libvips "
+                                   "(pip install pyvips)") from None
+        else:
+            raise ValueError(f"unknown imaging backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return _backends[name]
@@ -0,0 +1,138 @@
+"""
+Build Instrumentation
+Structured JSON-lines timing events and optional cProfile/tracemalloc
+captures for the build stages
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Configuration
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Settings live in the environment so worker processes and chained scripts
+# (deploy.sh → pipeline.py → optimize_images) share them
+EVENTS_ENV = 'PORTFOLIO_EVENTS'     # JSON-lines event log path ('-' = stderr)
+PROFILE_ENV = 'PORTFOLIO_PROFILE'   # Directory for cProfile/tracemalloc output
+PROFILE_TOP = 25                    # Functions / allocation sites per report
+TRACEMALLOC_FRAMES = 5
+
+_write_lock = threading.Lock()
+_profiling = threading.Lock()       # cProfile can't nest; inner stages go unprofiled
+
+def configure(events=None, profile=None):
+    """Enable the event log and/or profiling for this process and its children"""
+    if events:
+        os.environ[EVENTS_ENV] = events if events == '-' else os.path.abspath(events)
+    if profile:
+        os.environ[PROFILE_ENV] = os.path.abspath(profile)
+
+def add_arguments(parser):
+    """Add --events and --profile to a script's argument parser"""
+    parser.add_argument('--events', metavar='PATH',
+                        help="Append JSON-lines timing events to PATH ('-' for stderr)")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_DIR, metavar='DIR',
+                        help="Write cProfile/tracemalloc reports per stage to DIR "
+                             "(default: profiles/)")
+
+def configure_from_args(args):
+    configure(events=args.events, profile=args.profile)
+
+def enabled():
+    return bool(os.environ.get(EVENTS_ENV))
+
+def emit(event, **fields):
+    """Append one event to the log; a no-op unless --events is set"""
+    path = os.environ.get(EVENTS_ENV)
+    if not path:
+        return
+    record = {'ts': round(time.time(), 3), 'event': event, 'pid': os.getpid()}
+    record.update(fields)
+    line = json.dumps(record, default=str) + '\n'
+    with _write_lock:
+        if path == '-':
+            sys.stderr.write(line)
+        else:
+            with open(path, 'a') as f:
+                f.write(line)
+
+class Stage:
+    """Counters accumulated while a stage runs, emitted with its end event"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = dict(fields)
+
+    def add(self, **counters):
+        for key, value in counters.items():
+            self.fields[key] = self.fields.get(key, 0) + value
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+@contextmanager
+def stage(name, **fields):
+    """Time a build stage, emitting stage_start/stage_end events
+
+    Yields a Stage whose add()/set() fields (bytes_in, bytes_out, images...)
+    are included in stage_end. With --profile, the stage also runs under
+    cProfile and tracemalloc and its reports are written to the profile dir.
+    """
+    current = Stage(name, fields)
+    emit('stage_start', stage=name, **fields)
+    profiler = start_profile()
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield current
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        if profiler:
+            current.set(**stop_profile(name, profiler))
+        emit('stage_end', stage=name, status=status, seconds=round(seconds, 3), **current.fields)
+
+def start_profile():
+    if not os.environ.get(PROFILE_ENV) or not _profiling.acquire(blocking=False):
+        return None
+    import cProfile
+    import tracemalloc
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def stop_profile(name, profiler):
+    """Write <name>.prof and <name>.txt; returns fields for the stage_end event"""
+    import pstats
+    import tracemalloc
+    profiler.disable()
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    _profiling.release()
+
+    profile_dir = os.environ[PROFILE_ENV]
+    os.makedirs(profile_dir, exist_ok=True)
+    prof_path = os.path.join(profile_dir, f"{name}.prof")
+    report_path = os.path.join(profile_dir, f"{name}.txt")
+    profiler.dump_stats(prof_path)
+
+    with open(report_path, 'w') as f:
+        f.write(f"# {name}: top {PROFILE_TOP} functions by cumulative time\n")
+        pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        f.write(f"# {name}: top {PROFILE_TOP} allocation sites "
+                f"(peak traced {peak / (1024 * 1024):.1f} MB)\n")
+        for stat in snapshot.statistics('traceback')[:PROFILE_TOP]:
+            f.write(f"{stat.size / 1024:10.1f} KB  {stat.count:7d} blocks\n")
+            for line in stat.traceback.format():
+                f.write(f"    {line}\n")
+    print(f"   🔬 Profile for {name}: {report_path}")
+    return {'profile': prof_path, 'traced_peak_bytes': peak}
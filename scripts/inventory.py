@@ -0,0 +1,100 @@
+"""
+Filesystem Inventory
+One os.scandir walk of a directory tree with the stat result of every
+file, so build stages can share a listing instead of each re-walking and
+re-statting photos/ or optimized/
+"""
+
+import os
+
+IGNORED_SUFFIXES = ('.part', '.tmp')   # In-progress downloads and atomic writes
+
+class Inventory:
+    """Every visible file under root with its stat result
+
+    Paths are relative to root with '/' separators. Hidden entries (dot
+    files and folders: manifests, caches, sync state) and in-progress
+    writes are left out. A missing root gives an empty inventory.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}      # "<dir>/<file>" → os.stat_result
+        self.dirs = {}       # "<dir>" → [file names directly inside]; '' is root
+        self.scanned = 0     # Directories read
+        # Per top-level folder, so under()/subdirs() cost the folder's size, not the tree's
+        self._tree_files = {}   # "<top>" → {path below top: os.stat_result}
+        self._tree_dirs = {}    # "<top>" → [folders below top]
+        if os.path.isdir(root):
+            self._walk()
+
+    def _walk(self):
+        visited = set()
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            # Categories may be symlinks (e.g. to a network volume); don't loop
+            stat = os.stat(path)
+            if (stat.st_dev, stat.st_ino) in visited:
+                continue
+            visited.add((stat.st_dev, stat.st_ino))
+            names = self.dirs[rel_dir] = []
+            self.scanned += 1
+            top, _, below = rel_dir.partition('/')
+            if below:
+                self._tree_dirs.setdefault(top, []).append(below)
+            tree_files = self._tree_files.setdefault(top, {}) if top else None
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or entry.name.endswith(IGNORED_SUFFIXES):
+                        continue
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir():
+                            stack.append(rel_path)
+                        elif entry.is_file():
+                            stat = self.files[rel_path] = entry.stat()
+                            names.append(entry.name)
+                            if tree_files is not None:
+                                tree_files[f"{below}/{entry.name}" if below else entry.name] = stat
+                    except FileNotFoundError:
+                        continue  # Removed mid-walk
+            names.sort()
+
+    def __len__(self):
+        return len(self.files)
+
+    def path(self, rel_path):
+        return os.path.join(self.root, *rel_path.split('/'))
+
+    def stat(self, rel_path):
+        """Cached stat result for a file, or None if it wasn't there"""
+        return self.files.get(rel_path)
+
+    def categories(self):
+        """Top-level folders, sorted"""
+        return sorted(rel_dir for rel_dir in self.dirs if rel_dir and '/' not in rel_dir)
+
+    def listdir(self, rel_dir):
+        """Sorted names of the files directly inside rel_dir (not subfolders)"""
+        return self.dirs.get(rel_dir, [])
+
+    def under(self, rel_dir):
+        """{path relative to rel_dir: stat} for every file below rel_dir"""
+        top, _, below = rel_dir.partition('/')
+        files = self._tree_files.get(top, {})
+        if not below:
+            return dict(files)
+        prefix = below + '/'
+        return {rel_path[len(prefix):]: stat for rel_path, stat in files.items()
+                if rel_path.startswith(prefix)}
+
+    def subdirs(self, rel_dir):
+        """Every folder below rel_dir, relative to it, deepest first"""
+        top, _, below = rel_dir.partition('/')
+        dirs = self._tree_dirs.get(top, [])
+        if below:
+            prefix = below + '/'
+            dirs = [d[len(prefix):] for d in dirs if d.startswith(prefix)]
+        return sorted(dirs, key=lambda d: d.count('/'), reverse=True)
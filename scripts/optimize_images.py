@@ -5,12 +5,18 @@ Compresses and resizes images for web delivery
 """
 
 import os
-from PIL import Image
-from pathlib import Path
-import pillow_heif
+import sys
+import json
+import time
+import hashlib
+import argparse
+import resource
 
-# Register HEIC opener with Pillow
-pillow_heif.register_heif_opener()
+import dedup
+import imaging
+import quality as perceptual
+import inventory
+import instrumentation
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -24,8 +30,45 @@ MAX_HEIGHT = 4000            # Keep large dimensions
 JPEG_QUALITY = 95            # 95% quality (minimal loss)
 PRESERVE_FORMAT = False      # Convert all to JPG for browser compatibility
 
+# Responsive derivatives (written to <category>/w<width>/ for srcset)
+DERIVATIVE_WIDTHS = [400, 800, 1600]  # Only widths smaller than the main output are emitted
+DERIVATIVE_QUALITY = 85               # Smaller tiles tolerate more compression
+
+# Adaptive quality: per image, the lowest JPEG quality whose SSIM against
+# the resized (pre-encode) image still meets SSIM_TARGET. Off by default so
+# a build matches the fixed JPEG_QUALITY unless asked (--adaptive-quality).
+ADAPTIVE_QUALITY = False
+ADAPTIVE_ENV = 'PORTFOLIO_ADAPTIVE_QUALITY'  # Set by --adaptive-quality so workers see it
+SSIM_TARGET = 0.985          # 1.0 = identical; ~0.98+ is visually transparent for photos
+ADAPTIVE_MIN_QUALITY = 70    # Never search below this
+PROBE_SIZE = 384             # Trial encodes run on a probe this many px on its long edge
+
+# Modern formats written alongside each JPEG (format → quality); {} disables.
+# Formats the local Pillow build can't encode are skipped automatically.
+MODERN_FORMATS = {'AVIF': 55, 'WEBP': 82}
+FORMAT_EXTENSIONS = {'AVIF': 'avif', 'WEBP': 'webp'}
+
 SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.heic', '.heif', '.webp'}
 
+# Memory-bounded decoding
+REDUCED_DECODE = True        # Let the JPEG decoder scale down (1/2, 1/4, 1/8) toward the output size
+DRAFT_GAP = 2.0              # Decode to at least this multiple of the output size before LANCZOS
+MEMORY_BUDGET_MB = 1024      # Per worker; larger decodes are refused instead of risking OOM
+MEMORY_BUDGET_ENV = 'PORTFOLIO_MEMORY_BUDGET'  # Set by --memory-budget so workers see it
+BYTES_PER_PIXEL = 4          # Pillow keeps RGB/RGBA pixels in 32-bit words
+WORKING_COPIES = 3           # Decoded buffer + mode-converted copy + resized output
+
+# Build manifest: source hash + settings + output for every processed image
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, '.manifest.json')
+MANIFEST_VERSION = 1
+
+# Near-duplicates (the same shot in several folders or formats) are encoded
+# once; the other copies are recorded as aliases of the one that's kept.
+# Off unless --deduplicate is passed: an alias hides a photo from the site
+DEDUPLICATE = False
+DUPLICATE_DISTANCE = 3       # Max differing bits between 64-bit perceptual hashes
+PHASH_CACHE_PATH = os.path.join(OUTPUT_DIR, '.phash_cache.json')  # Keyed by source SHA-256
+
 def setup_directories():
     """Create output directory structure matching source"""
     if not os.path.exists(OUTPUT_DIR):
@@ -38,20 +81,188 @@ def setup_directories():
             output_category_path = os.path.join(OUTPUT_DIR, category)
             os.makedirs(output_category_path, exist_ok=True)
 
+def derivative_path(output_path, width):
+    """Path of the <width>px derivative for an output image"""
+    directory, filename = os.path.split(output_path)
+    return os.path.join(directory, f"w{width}", filename)
+
+def alternate_path(path, extension):
+    """Path of a modern-format sibling of an output image"""
+    return f"{os.path.splitext(path)[0]}.{extension}"
+
+def available_modern_formats():
+    """MODERN_FORMATS entries the imaging backend can actually encode"""
+    encoders = imaging.get_backend().encoders()
+    return {fmt: quality for fmt, quality in MODERN_FORMATS.items() if fmt in encoders}
+
+def output_size(width, height):
+    """Size after fitting width x height inside MAX_WIDTH x MAX_HEIGHT"""
+    ratio = min(MAX_WIDTH / width, MAX_HEIGHT / height, 1)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+def decode_cost_mb(width, height):
+    """Estimated peak working memory for decoding and converting an image"""
+    return width * height * BYTES_PER_PIXEL * WORKING_COPIES / (1024 * 1024)
+
+def memory_budget_mb():
+    return float(os.environ.get(MEMORY_BUDGET_ENV) or MEMORY_BUDGET_MB)
+
+def proc_status_mb(field):
+    """A /proc/self/status memory figure (e.g. VmHWM) in MB, or None off Linux"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss():
+    """Restart the kernel's peak RSS counter so it covers one image
+
+    Returns False where that's unsupported (not Linux); peak_rss_mb() is
+    then the process's lifetime peak.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Peak RSS since reset_peak_rss(), else this process's lifetime peak"""
+    peak = proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def current_rss_mb():
+    rss = proc_status_mb('VmRSS')
+    return rss if rss is not None else peak_rss_mb()
+
+def open_within_budget(backend, input_path, width=None):
+    """Open a source set to decode toward its output size within the budget
+
+    The output size is narrowed to width when that's smaller. Returns
+    (source, target, estimated_mb); the caller closes source. If
+    the reduced decode at DRAFT_GAP would still be over budget, the source
+    is reopened with the gap halved down to 1 (a JPEG takes one draft per
+    open), and only then refused with MemoryError.
+    """
+    budget = memory_budget_mb()
+    gap = DRAFT_GAP if REDUCED_DECODE else None
+    while True:
+        source = backend.open(input_path)
+        try:
+            target = output_size(*source.size)
+            if width and width < target[0]:
+                target = (width, max(1, round(target[1] * width / target[0])))
+            source.shrink_on_load(target, gap)
+            decoded_size = source.decoded_size
+            estimated_mb = decode_cost_mb(*decoded_size)
+        except BaseException:
+            source.__exit__(None, None, None)
+            raise
+        if estimated_mb <= budget:
+            return source, target, estimated_mb
+        source.__exit__(None, None, None)
+        if not gap or gap <= 1:
+            raise MemoryError(f"{decoded_size[0]}x{decoded_size[1]} needs ~{estimated_mb:.0f} MB "
+                              f"to decode, over the {budget:.0f} MB budget")
+        gap = max(1.0, gap / 2)
+
+def adaptive_enabled():
+    return ADAPTIVE_QUALITY or os.environ.get(ADAPTIVE_ENV) == '1'
+
+def choose_quality(backend, img, ceiling):
+    """Lowest JPEG quality in [ADAPTIVE_MIN_QUALITY, ceiling] meeting SSIM_TARGET
+
+    Trial encodes run on a PROBE_SIZE downscale of img, so the search costs
+    about the same for every image; each quality is encoded at most once.
+    Returns (quality, ssim, bytes_saved), where bytes_saved estimates the
+    saving on the full-size output from the probe's size ratio between
+    ceiling and the chosen quality.
+    """
+    width, height = backend.size(img)
+    scale = min(PROBE_SIZE / max(width, height), 1)
+    probe = img
+    if scale < 1:
+        probe = backend.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))))
+    reference = backend.planes(probe)
+    trials = {}  # quality → (ssim, bytes)
+    
+    def measure(q):
+        if q not in trials:
+            data = backend.to_bytes(probe, 'JPEG', q)
+            trials[q] = (perceptual.ssim_planes(reference, backend.planes(backend.decode(data))),
+                         len(data))
+        return trials[q][0]
+    
+    chosen = perceptual.lowest_quality(measure, SSIM_TARGET, ADAPTIVE_MIN_QUALITY, ceiling)
+    measure(ceiling)
+    ratio = trials[chosen][1] / trials[ceiling][1]
+    return chosen, trials[chosen][0], ratio
+
+def save_timed(backend, img, path, output_format, stats, quality=None):
+    """Save an image and add its size and encode time to stats[output_format]
+
+    The file is written beside path and renamed over it, so a re-encode
+    gets a new inode: site/images hardlinks keep the bytes they were
+    published with, and a failed encode never leaves a partial output.
+    """
+    start = time.perf_counter()
+    tmp_path = path + '.tmp'
+    try:
+        backend.save(img, tmp_path, output_format, quality)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    entry = stats.setdefault(output_format, {'bytes': 0, 'seconds': 0.0})
+    entry['bytes'] += os.path.getsize(path)
+    entry['seconds'] += time.perf_counter() - start
+
 def optimize_image(input_path, output_path):
-    """Optimize a single image (or copy if optimization disabled)"""
+    """Optimize a single image (or copy if optimization disabled)
+
+    When optimizing, the source is decoded once and every DERIVATIVE_WIDTHS
+    variant narrower than the main output is resized from that same buffer.
+    JPEG outputs (and their derivatives) also get a sibling per available
+    MODERN_FORMATS entry. Decoding, resizing and encoding go through the
+    configured imaging backend (see imaging.py). Large sources are decoded
+    at a reduced scale, and sources whose decode would exceed
+    MEMORY_BUDGET_MB fail instead of exhausting the worker. With adaptive
+    quality on, JPEG outputs use the quality choose_quality() finds (and
+    derivatives never exceed it). Returns a dict with the output
+    width/height, derivative widths, modern format extensions, per-format
+    encode stats, decode/resize/encode timings, memory figures and, when
+    adaptive, the chosen quality, True for a plain copy, or False on failure.
+    """
     try:
         # If optimization is disabled, just copy the file
         if not ENABLE_OPTIMIZATION:
             import shutil
-            shutil.copy2(input_path, output_path)
+            # Replace rather than overwrite, for the same reason as save_timed()
+            shutil.copy2(input_path, output_path + '.tmp')
+            os.replace(output_path + '.tmp', output_path)
             return True
         
         # Open image
-        with Image.open(input_path) as img:
+        backend = imaging.get_backend()
+        timings = {'decode': 0.0, 'resize': 0.0, 'encode': 0.0}
+        phase_start = time.perf_counter()
+        per_image = reset_peak_rss()
+        rss_before = current_rss_mb()
+        source, target, estimated_mb = open_within_budget(backend, input_path)
+        with source:
+            source_size = source.size
+            decoded_size = source.decoded_size
             # Determine output format
             if PRESERVE_FORMAT:
-                output_format = img.format if img.format in ['JPEG', 'PNG', 'WEBP'] else 'JPEG'
+                output_format = source.format if source.format in ['JPEG', 'PNG', 'WEBP'] else 'JPEG'
                 # Update output path extension if needed
                 if output_format != 'JPEG':
                     base = os.path.splitext(output_path)[0]
@@ -60,35 +271,403 @@ def optimize_image(input_path, output_path):
             else:
                 output_format = 'JPEG'
             
-            # Convert RGBA to RGB if saving as JPEG
-            if output_format == 'JPEG':
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
+            # Convert to RGB (flattening transparency onto white) if saving as JPEG
+            img = source.load(flatten=output_format == 'JPEG')
+            timings['decode'] = time.perf_counter() - phase_start
             
             # Resize if needed
-            if img.width > MAX_WIDTH or img.height > MAX_HEIGHT:
-                img.thumbnail((MAX_WIDTH, MAX_HEIGHT), Image.Resampling.LANCZOS)
+            phase_start = time.perf_counter()
+            if backend.size(img) != target:
+                img = backend.resize(img, target, reducing_gap=imaging.RESIZE_REDUCING_GAP)
+            width, height = backend.size(img)
+            timings['resize'] += time.perf_counter() - phase_start
             
             # Save optimized version
-            save_kwargs = {'optimize': True}
-            if output_format == 'JPEG':
-                save_kwargs['quality'] = JPEG_QUALITY
+            jpeg_quality = JPEG_QUALITY if output_format == 'JPEG' else None
+            derivative_quality = DERIVATIVE_QUALITY if output_format == 'JPEG' else None
+            adaptive = None
+            if jpeg_quality and adaptive_enabled():
+                phase_start = time.perf_counter()
+                chosen, score, ratio = choose_quality(backend, img, JPEG_QUALITY)
+                timings['search'] = time.perf_counter() - phase_start
+                adaptive = {'quality': chosen, 'ssim': round(score, 4), 'ratio': ratio}
+                jpeg_quality = chosen
+                derivative_quality = min(DERIVATIVE_QUALITY, chosen)
             
-            img.save(output_path, output_format, **save_kwargs)
+            stats = {}
+            modern_formats = available_modern_formats() if output_format == 'JPEG' else {}
             
-        return True
+            def save_with_alternates(image, path, quality):
+                save_timed(backend, image, path, output_format, stats, quality)
+                for fmt, modern_quality in modern_formats.items():
+                    save_timed(backend, image, alternate_path(path, FORMAT_EXTENSIONS[fmt]),
+                               fmt, stats, modern_quality)
+            
+            save_with_alternates(img, output_path, jpeg_quality)
+            if adaptive:
+                # The main output at JPEG_QUALITY would have been 1/ratio times this size
+                written = os.path.getsize(output_path)
+                adaptive['bytes_saved'] = round(written / adaptive.pop('ratio')) - written
+            
+            # Emit smaller derivatives from the already-resized image
+            variants = []
+            for variant_width in sorted(DERIVATIVE_WIDTHS, reverse=True):
+                if variant_width >= width:
+                    continue
+                variant_height = max(1, round(height * variant_width / width))
+                variant_path = derivative_path(output_path, variant_width)
+                os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+                phase_start = time.perf_counter()
+                variant = backend.resize(img, (variant_width, variant_height))
+                timings['resize'] += time.perf_counter() - phase_start
+                save_with_alternates(variant, variant_path, derivative_quality)
+                variants.append(variant_width)
+            
+            timings['encode'] = sum(entry['seconds'] for entry in stats.values())
+            rss_after = peak_rss_mb()
+            result = {
+                'width': width,
+                'height': height,
+                'variants': sorted(variants),
+                'formats': [FORMAT_EXTENSIONS[fmt] for fmt in modern_formats],
+                'encode_stats': stats,
+                'timings': timings,
+                'memory': {
+                    'source': list(source_size),
+                    'decoded': list(decoded_size),
+                    'estimated_mb': round(estimated_mb, 1),
+                    # Without a per-image reset this is the worker's lifetime peak
+                    'peak_rss_mb': round(rss_after, 1),
+                    'peak_rss_scope': 'image' if per_image else 'process',
+                    'rss_growth_mb': round(rss_after - rss_before, 1),
+                },
+            }
+            if adaptive:
+                result['adaptive'] = adaptive
+            return result
     except Exception as e:
         print(f"   ⚠️  Failed to process {input_path}: {e}")
         return False
 
-def process_all_images():
-    """Process all images in the photos directory"""
+def _optimize_job(job):
+    """Worker entry point: run optimize_image() for one (input, output) pair"""
+    input_path, output_path = job
+    return optimize_image(input_path, output_path)
+
+def current_settings():
+    """Settings that affect the encoded output (a change forces a re-encode)"""
+    return {
+        'enable_optimization': ENABLE_OPTIMIZATION,
+        'max_width': MAX_WIDTH,
+        'max_height': MAX_HEIGHT,
+        'jpeg_quality': JPEG_QUALITY,
+        'preserve_format': PRESERVE_FORMAT,
+        'derivative_widths': sorted(DERIVATIVE_WIDTHS),
+        'derivative_quality': DERIVATIVE_QUALITY,
+        'reduced_decode': DRAFT_GAP if REDUCED_DECODE else None,
+        'backend': imaging.backend_name(),
+        'modern_formats': available_modern_formats(),
+        'adaptive_quality': ({'ssim_target': SSIM_TARGET, 'min_quality': ADAPTIVE_MIN_QUALITY,
+                              'probe_size': PROBE_SIZE} if adaptive_enabled() else None),
+    }
+
+def load_manifest():
+    """Load the build manifest, or start a fresh one if missing/unreadable"""
+    if os.path.exists(MANIFEST_PATH):
+        try:
+            with open(MANIFEST_PATH, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️  Ignoring unreadable manifest {MANIFEST_PATH}: {e}")
+    return {'version': MANIFEST_VERSION, 'files': {}}
+
+def save_manifest(manifest):
+    """Write the manifest atomically so an interrupted run never corrupts it"""
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_fingerprint(input_path, entry, stat=None):
+    """Return (sha256, size, mtime) for a source, reusing the cached hash
+    from the manifest entry when size and mtime are unchanged. stat is a
+    cached os.stat() result for input_path."""
+    stat = stat or os.stat(input_path)
+    if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+        return entry['sha256'], stat.st_size, stat.st_mtime
+    return file_hash(input_path), stat.st_size, stat.st_mtime
+
+def make_job(manifest, category, image_file, settings=None, fingerprint=None):
+    """Return the job for one source image, or None if it's up to date
+
+    A job is a (category, image_file, input_path, output_path, record)
+    tuple, where record is the manifest entry to store once it succeeds.
+    An image is skipped only when its source hash, the settings and the
+    recorded output all still match. fingerprint is a precomputed
+    source_fingerprint() result.
+    """
+    settings = settings or current_settings()
+    input_path = os.path.join(INPUT_DIR, category, image_file)
+    output_category_path = os.path.join(OUTPUT_DIR, category)
+    
+    # Determine output filename
+    if ENABLE_OPTIMIZATION and not PRESERVE_FORMAT:
+        output_filename = os.path.splitext(image_file)[0] + '.jpg'
+    else:
+        output_filename = image_file
+    
+    output_path = os.path.join(output_category_path, output_filename)
+    output_rel = os.path.relpath(output_path, OUTPUT_DIR)
+    
+    entry = manifest['files'].get(f"{category}/{image_file}")
+    sha256, size, mtime = fingerprint or source_fingerprint(input_path, entry)
+    
+    # Skip if the same source was already built with the same settings
+    if (entry and entry.get('sha256') == sha256
+            and entry.get('settings') == settings
+            and entry.get('output') == output_rel
+            and os.path.exists(output_path)):
+        if entry.get('mtime') != mtime:
+            entry['mtime'] = mtime
+        return None
+    
+    os.makedirs(output_category_path, exist_ok=True)
+    record = {
+        'sha256': sha256,
+        'size': size,
+        'mtime': mtime,
+        'settings': settings,
+        'output': output_rel,
+    }
+    return (category, image_file, input_path, output_path, record)
+
+def record_result(manifest, job, result, format_totals):
+    """Store a successful job in the manifest and clean up what it replaced
+
+    Per-format encode stats from the result are added to format_totals, and
+    an "image" event with bytes in/out and the decode/resize/encode split
+    is emitted.
+    """
+    category, image_file, input_path, output_path, record = job
+    event = {'stage': 'optimize', 'image': f"{category}/{image_file}", 'bytes_in': record['size']}
+    if isinstance(result, dict):
+        encode_stats = result.pop('encode_stats', {})
+        for fmt, stats in encode_stats.items():
+            totals = format_totals.setdefault(fmt, {'bytes': 0, 'seconds': 0.0})
+            totals['bytes'] += stats['bytes']
+            totals['seconds'] += stats['seconds']
+        event['bytes_out'] = sum(stats['bytes'] for stats in encode_stats.values())
+        event['bytes_out_by_format'] = {fmt: stats['bytes'] for fmt, stats in encode_stats.items()}
+        event.update({phase: round(seconds, 4)
+                      for phase, seconds in result.pop('timings', {}).items()})
+        event.update(result.pop('memory', {}))
+        if 'adaptive' in result:
+            event['quality'] = result['adaptive']['quality']
+            event['bytes_saved'] = result['adaptive']['bytes_saved']
+        record.update(result)
+        record['bytes_out'] = event['bytes_out']
+        record['encode_seconds'] = round(sum(stats['seconds'] for stats in encode_stats.values()), 3)
+    instrumentation.emit('image', **event)
+    # Drop files the previous build made that this one no longer
+    # does (renamed output, fewer derivatives or formats)
+    previous = manifest['files'].get(f"{category}/{image_file}")
+    if previous:
+        remove_paths(set(entry_outputs(previous)) - set(entry_outputs(record)))
+    manifest['files'][f"{category}/{image_file}"] = record
+
+def _hash_job(input_path):
+    """Worker entry point: perceptual hash of one source, or None on failure"""
+    try:
+        imaging.ensure_opener(input_path)
+        return dedup.image_hash(input_path)
+    except Exception as e:
+        print(f"   ⚠️  Could not hash {input_path}: {e}")
+        return None
+
+def source_hashes(sources, workers):
+    """Perceptual hashes keyed by source SHA-256, computing only uncached ones
+
+    sources is [(category, image_file, input_path, fingerprint)].
+    """
+    hashes = dedup.load_cache(PHASH_CACHE_PATH)
+    missing = {}
+    for _, _, input_path, (sha256, _, _) in sources:
+        if sha256 not in hashes:
+            missing.setdefault(sha256, input_path)
+    
+    if missing:
+        print(f"🔍 Hashing {len(missing)} images for duplicate detection...")
+        paths = list(missing.values())
+        if workers > 1 and len(paths) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_hash_job, paths, chunksize=8))
+        else:
+            results = [_hash_job(path) for path in paths]
+        for sha256, result in zip(missing, results):
+            if result:
+                hashes[sha256] = result
+    
+    live = {fingerprint[0] for _, _, _, fingerprint in sources}
+    hashes = {sha256: entry for sha256, entry in hashes.items() if sha256 in live}
+    dedup.save_cache(PHASH_CACHE_PATH, hashes)
+    return hashes
+
+def output_shared(manifest, key, output):
+    """Whether an entry other than key also claims output"""
+    return any(other_key != key and other.get('output') == output
+               for other_key, other in manifest['files'].items())
+
+def record_duplicate(manifest, key, canonical, fingerprint):
+    """Record a source as an alias of canonical instead of encoding it"""
+    sha256, size, mtime = fingerprint
+    previous = manifest['files'].get(key)
+    if previous and previous.get('output') and not output_shared(manifest, key, previous['output']):
+        remove_output(previous)
+    manifest['files'][key] = {
+        'sha256': sha256,
+        'size': size,
+        'mtime': mtime,
+        'duplicate_of': canonical,
+    }
+
+def collect_jobs(manifest, workers=1, photos=None):
+    """List INPUT_DIR and return (jobs, skipped, seen, duplicates)
+
+    See make_job() for the job layout. seen holds every manifest key found;
+    duplicates maps each near-duplicate source key to the key that is
+    encoded in its place (those sources get no job). photos is an
+    Inventory of INPUT_DIR to reuse instead of listing it again.
+    """
+    jobs = []
+    total_skipped = 0
+    seen = set()
+    settings = current_settings()
+    sources = []
+    photos = photos or inventory.Inventory(INPUT_DIR)
+
+    for category in photos.categories():
+        category_path = os.path.join(INPUT_DIR, category)
+        
+        print(f"📂 Processing: {category}")
+        
+        output_category_path = os.path.join(OUTPUT_DIR, category)
+        os.makedirs(output_category_path, exist_ok=True)
+        
+        # Process all images in this category
+        images = [f for f in photos.listdir(category)
+                 if os.path.splitext(f.lower())[1] in SUPPORTED_FORMATS]
+        
+        for image_file in images:
+            key = f"{category}/{image_file}"
+            seen.add(key)
+            input_path = os.path.join(category_path, image_file)
+            fingerprint = source_fingerprint(input_path, manifest['files'].get(key),
+                                             photos.stat(key))
+            sources.append((category, image_file, input_path, fingerprint))
+    
+    duplicates = {}
+    if DEDUPLICATE and sources:
+        hashes = source_hashes(sources, workers)
+        duplicates = dedup.find_duplicates(
+            [(f"{category}/{image_file}", fingerprint[0], fingerprint[1])
+             for category, image_file, _, fingerprint in sources if fingerprint[0] in hashes],
+            hashes, DUPLICATE_DISTANCE)
+    
+    for category, image_file, input_path, fingerprint in sources:
+        key = f"{category}/{image_file}"
+        if key in duplicates:
+            record_duplicate(manifest, key, duplicates[key], fingerprint)
+            continue
+        job = make_job(manifest, category, image_file, settings, fingerprint)
+        if job is None:
+            total_skipped += 1
+        else:
+            jobs.append(job)
+
+    return jobs, total_skipped, seen, duplicates
+
+def entry_outputs(entry):
+    """Every file a manifest entry produced: output, derivatives, alternates"""
+    if 'output' not in entry:
+        return []  # Duplicate alias
+    output_path = os.path.join(OUTPUT_DIR, entry['output'])
+    primaries = [output_path] + [derivative_path(output_path, width)
+                                 for width in entry.get('variants', [])]
+    paths = []
+    for path in primaries:
+        paths.append(path)
+        paths.extend(alternate_path(path, ext) for ext in entry.get('formats', []))
+    return paths
+
+def remove_paths(paths):
+    """Delete each existing path; returns how many were removed"""
+    removed = 0
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+    return removed
+
+def remove_output(entry):
+    """Delete a manifest entry's output, derivatives and alternates"""
+    return remove_paths(entry_outputs(entry)) > 0
+
+def prune_outputs(manifest, seen):
+    """Drop manifest entries (and their outputs) whose source has disappeared"""
+    files = manifest['files']
+    pruned = 0
+    for key in sorted(set(files) - seen):
+        entry = files.pop(key)
+        # Another source (e.g. IMG_1.HEIC vs IMG_1.jpg) may share this output
+        if 'output' not in entry or output_shared(manifest, key, entry['output']):
+            continue
+        if remove_output(entry):
+            print(f"   🗑️  {entry['output']} (source removed)")
+            pruned += 1
+    return pruned
+
+def run_jobs(jobs, workers):
+    """Optimize jobs serially or across a process pool
+
+    Yields (job, result) as each image finishes, where result is the
+    optimize_image() return value. A worker that dies counts as a failed
+    image rather than aborting the whole run.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield job, optimize_image(job[2], job[3])
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_optimize_job, (job[2], job[3])): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"   ⚠️  Failed to process {job[2]}: {e}")
+                result = False
+            yield job, result
+
+def process_all_images(workers=1, photos=None):
+    """Process all images in the photos directory
+
+    photos is an Inventory of INPUT_DIR (e.g. watch mode's latest scan) to
+    use instead of listing it again.
+    """
 
     mode_text = "Copying Images (Full Quality)" if not ENABLE_OPTIMIZATION else "Optimizing Images"
     print(f"🚀 Starting image optimization...")
@@ -103,62 +682,157 @@ def process_all_images():
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    total_images = 0
-    
     if ENABLE_OPTIMIZATION:
         print(f"   Quality: {JPEG_QUALITY}%")
         print(f"   Max Size: {MAX_WIDTH}x{MAX_HEIGHT}px")
+        print(f"   Backend: {imaging.backend_name()}")
+        modern_formats = available_modern_formats()
+        if modern_formats:
+            print(f"   Formats: JPEG + {', '.join(modern_formats)}")
     else:
         print(f"   Mode: FULL QUALITY (No compression)")
+    print(f"   Workers: {workers}")
+    if ENABLE_OPTIMIZATION and adaptive_enabled():
+        print(f"   Adaptive quality: SSIM ≥ {SSIM_TARGET}, quality {ADAPTIVE_MIN_QUALITY}-{JPEG_QUALITY}")
+    if ENABLE_OPTIMIZATION:
+        print(f"   Memory budget: {memory_budget_mb():.0f} MB/worker")
     print()
     
-    total_processed = 0
-    total_skipped = 0
-    
-    # Process each category folder
-    for category in sorted(os.listdir(INPUT_DIR)):
-        category_path = os.path.join(INPUT_DIR, category)
+    with instrumentation.stage('optimize', workers=workers) as stage:
+        total_processed = 0
+        bytes_in = 0
+        format_totals = {}
+        peak_rss = 0.0
+        largest_decode = None
+        adaptive_qualities = []
+        adaptive_saved = 0
         
-        if not os.path.isdir(category_path):
-            continue
+        # Find every image whose source or settings changed since the last build
+        manifest = load_manifest()
+        jobs, total_skipped, seen, duplicates = collect_jobs(manifest, workers, photos)
         
-        print(f"📂 Processing: {category}")
+        if jobs:
+            print()
         
-        output_category_path = os.path.join(OUTPUT_DIR, category)
+        start_time = time.perf_counter()
         
-        # Process all images in this category
-        images = [f for f in os.listdir(category_path) 
-                 if os.path.splitext(f.lower())[1] in SUPPORTED_FORMATS]
-        
-        for image_file in sorted(images):
-            input_path = os.path.join(category_path, image_file)
-            
-            # Determine output filename
-            if ENABLE_OPTIMIZATION and not PRESERVE_FORMAT:
-                output_filename = os.path.splitext(image_file)[0] + '.jpg'
-            else:
-                output_filename = image_file
-            
-            output_path = os.path.join(output_category_path, output_filename)
-            
-            # Skip if already processed and newer than source
-            if os.path.exists(output_path):
-                if os.path.getmtime(output_path) > os.path.getmtime(input_path):
+        try:
+            for job, result in run_jobs(jobs, workers):
+                category, image_file, input_path, output_path, record = job
+                if result:
+                    label = image_file if workers <= 1 else f"{category}/{image_file}"
+                    print(f"   ✓ {label}")
+                    total_processed += 1
+                    bytes_in += record['size']
+                    memory = result.get('memory') if isinstance(result, dict) else None
+                    if memory:
+                        peak_rss = max(peak_rss, memory['peak_rss_mb'])
+                        if not largest_decode or memory['estimated_mb'] > largest_decode[1]['estimated_mb']:
+                            largest_decode = (f"{category}/{image_file}", memory)
+                    adaptive = result.get('adaptive') if isinstance(result, dict) else None
+                    if adaptive:
+                        adaptive_qualities.append(adaptive['quality'])
+                        adaptive_saved += adaptive['bytes_saved']
+                    record_result(manifest, job, result, format_totals)
+                else:
                     total_skipped += 1
-                    continue
-            
-            # Process the image
-            if optimize_image(input_path, output_path):
-                print(f"   ✓ {image_file}")
-                total_processed += 1
-            else:
-                total_skipped += 1
-    
+        
+            total_pruned = prune_outputs(manifest, seen)
+        finally:
+            # Persist progress even if the run is interrupted part-way
+            save_manifest(manifest)
+        
+        elapsed = time.perf_counter() - start_time
+        
+        # What the aliases would have cost: their kept copy's output and encode time
+        saved_bytes = saved_seconds = 0
+        for canonical in duplicates.values():
+            kept = manifest['files'].get(canonical, {})
+            saved_bytes += kept.get('bytes_out', 0)
+            saved_seconds += kept.get('encode_seconds', 0)
+        
+        stage.set(images=total_processed, skipped=total_skipped, pruned=total_pruned,
+                  duplicates=len(duplicates), duplicate_bytes_saved=saved_bytes,
+                  duplicate_seconds_saved=round(saved_seconds, 3),
+                  peak_rss_mb=round(peak_rss, 1),
+                  adaptive_bytes_saved=adaptive_saved,
+                  bytes_in=bytes_in,
+                  bytes_out=sum(totals['bytes'] for totals in format_totals.values()))
+        
     print()
     action_text = "Complete!" if not ENABLE_OPTIMIZATION else "Optimization Complete!"
     print(f"✅ {action_text}")
     print(f"   Processed: {total_processed} images")
     print(f"   Skipped: {total_skipped} images (already processed)")
+    if total_pruned:
+        print(f"   Pruned: {total_pruned} outputs (source removed)")
+    if duplicates:
+        print(f"   Duplicates: {len(duplicates)} images aliased "
+              f"({saved_bytes / (1024 * 1024):.1f} MB output, {saved_seconds:.1f}s encoding saved)")
+    if total_processed and elapsed > 0:
+        mb_in = bytes_in / (1024 * 1024)
+        print(f"   Throughput: {total_processed / elapsed:.2f} images/s, "
+              f"{mb_in / elapsed:.2f} MB/s ({elapsed:.1f}s)")
+    if largest_decode:
+        name, memory = largest_decode
+        print(f"   Memory: {peak_rss:.0f} MB peak RSS per worker; largest decode {name} "
+              f"({memory['decoded'][0]}x{memory['decoded'][1]}, ~{memory['estimated_mb']:.0f} MB)")
+    if adaptive_qualities:
+        print(f"   Adaptive quality: average {sum(adaptive_qualities) / len(adaptive_qualities):.0f} "
+              f"(range {min(adaptive_qualities)}-{max(adaptive_qualities)}), "
+              f"~{adaptive_saved / (1024 * 1024):.1f} MB saved vs {JPEG_QUALITY}")
+    if format_totals:
+        report_format_totals(format_totals)
+
+def report_format_totals(format_totals):
+    """Print bytes written and encode time per format, relative to JPEG"""
+    baseline = format_totals.get('JPEG', {}).get('bytes', 0)
+    print("   Formats:")
+    for fmt, totals in sorted(format_totals.items(), key=lambda item: item[0] != 'JPEG'):
+        mb_out = totals['bytes'] / (1024 * 1024)
+        if fmt == 'JPEG':
+            saving = "baseline"
+        elif baseline:
+            saving = f"{(totals['bytes'] / baseline - 1) * 100:+.0f}% vs JPEG"
+        else:
+            saving = ""
+        print(f"      {fmt:<5} {mb_out:8.2f} MB  {totals['seconds']:7.1f}s encode  {saving}")
+
+def add_arguments(parser):
+    """Add the encode settings (--adaptive-quality, --memory-budget, --deduplicate) to a parser"""
+    parser.add_argument('--adaptive-quality', action='store_true',
+                        help=f"Pick each JPEG's lowest quality with SSIM ≥ {SSIM_TARGET} "
+                             f"(between {ADAPTIVE_MIN_QUALITY} and {JPEG_QUALITY})")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help=f"Max estimated decode memory per worker (default: {MEMORY_BUDGET_MB})")
+    parser.add_argument('--deduplicate', action='store_true',
+                        help="Encode near-duplicate photos once and alias the other copies")
+
+def configure_from_args(args):
+    global DEDUPLICATE
+    if args.adaptive_quality:
+        os.environ[ADAPTIVE_ENV] = '1'
+    if args.memory_budget:
+        os.environ[MEMORY_BUDGET_ENV] = str(args.memory_budget)
+    if args.deduplicate:
+        DEDUPLICATE = True
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize photos for web delivery")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count, 1 = serial)")
+    add_arguments(parser)
+    imaging.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts optimize`"""
+    args = parse_args(argv)
+    configure_from_args(args)
+    imaging.configure_from_args(args)
+    instrumentation.configure_from_args(args)
+    process_all_images(workers=max(1, args.workers))
 
 if __name__ == '__main__':
-    process_all_images()
+    cli()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Streaming Sync + Optimize Pipeline
+Optimizes each photo as soon as its download lands, instead of waiting for
+the whole Drive sync to finish before optimize_images.py starts
+"""
+
+import os
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import sync_from_drive
+import optimize_images
+import imaging
+import instrumentation
+
+# Pipeline Settings
+DEFAULT_QUEUE_SIZE = 32     # Downloaded-but-not-yet-submitted images before downloads pause
+
+class StageStats:
+    """Item count, busy window and queue depth samples for one stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.first = None
+        self.last = None
+        self.depth_samples = []
+        self.lock = threading.Lock()
+
+    def mark(self, depth=None):
+        """Count one item finishing now, optionally sampling its queue depth"""
+        now = time.perf_counter()
+        with self.lock:
+            self.items += 1
+            self.first = self.first if self.first is not None else now
+            self.last = now
+            if depth is not None:
+                self.depth_samples.append(depth)
+
+    def report(self):
+        busy = (self.last - self.first) if self.items else 0.0
+        line = f"      {self.name:<9} {self.items:5d} images  {busy:7.1f}s"
+        if self.depth_samples:
+            mean_depth = sum(self.depth_samples) / len(self.depth_samples)
+            line += f"  queue max {max(self.depth_samples)}, mean {mean_depth:.1f}"
+        print(line)
+
+def run_pipeline(workers, concurrency, queue_size, chunk_size, single_query, full):
+    """Sync from Drive while a process pool optimizes finished downloads"""
+    print("🚀 Streaming Sync → Optimize Pipeline")
+    print(f"   Download concurrency: {concurrency}")
+    print(f"   Optimize workers: {workers}")
+    print(f"   Queue size: {queue_size}")
+    print()
+
+    ready = queue.Queue(maxsize=queue_size)
+    manifest = optimize_images.load_manifest()
+    settings = optimize_images.current_settings()
+    format_totals = {}
+    manifest_lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(workers * 2)
+
+    download_stage = StageStats('download')
+    optimize_stage = StageStats('optimize')
+    start_time = time.perf_counter()
+
+    def on_downloaded(local_path):
+        # Blocks the download thread while the queue is full (backpressure)
+        ready.put(local_path)
+        download_stage.mark(depth=ready.qsize())
+
+    def finish(job, future):
+        try:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"   ⚠️  Failed to process {job[2]}: {e}")
+                result = False
+            with manifest_lock:
+                if result:
+                    optimize_images.record_result(manifest, job, result, format_totals)
+                    print(f"   ✓ optimized {job[0]}/{job[1]}")
+            optimize_stage.mark()
+        except Exception as e:
+            print(f"   ⚠️  Failed to record {job[2]}: {e}")
+        finally:
+            # A lost slot would eventually block the consumer for good
+            in_flight.release()
+
+    failures = []
+
+    def consume(executor):
+        try:
+            submit_ready(executor)
+        except BaseException as e:
+            # e.g. BrokenProcessPool: keep taking downloads so the sync can
+            # finish instead of blocking in ready.put(); raised once it has
+            failures.append(e)
+            print(f"   ❌ Optimizing stopped: {e!r}; finishing the sync first")
+            while ready.get() is not None:
+                pass
+
+    def submit_ready(executor):
+        while True:
+            local_path = ready.get()
+            if local_path is None:
+                return
+            parts = os.path.relpath(local_path, optimize_images.INPUT_DIR).split(os.sep)
+            if len(parts) != 2:
+                continue  # Only <category>/<image> files are optimized
+            category, image_file = parts
+            if os.path.splitext(image_file.lower())[1] not in optimize_images.SUPPORTED_FORMATS:
+                continue
+            try:
+                with manifest_lock:
+                    # Known duplicates wait for the catch-up pass to re-check them
+                    entry = manifest['files'].get(f"{category}/{image_file}")
+                    if entry and 'duplicate_of' in entry:
+                        continue
+                    job = optimize_images.make_job(manifest, category, image_file, settings)
+            except OSError as e:
+                # Left for the catch-up pass; never stall the download threads
+                print(f"   ⚠️  Failed to queue {local_path}: {e}")
+                continue
+            if job is None:
+                continue
+            in_flight.acquire()
+            try:
+                future = executor.submit(optimize_images._optimize_job, (job[2], job[3]))
+            except BaseException:
+                in_flight.release()
+                raise
+            future.add_done_callback(lambda f, job=job: finish(job, f))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        consumer = threading.Thread(target=consume, args=(executor,), daemon=True)
+        consumer.start()
+        try:
+            sync_from_drive.sync_photos(concurrency=concurrency, chunk_size=chunk_size,
+                                        single_query=single_query, full=full,
+                                        on_downloaded=on_downloaded)
+        finally:
+            ready.put(None)
+            consumer.join()
+    # Leaving the executor block waits for every submitted image
+    os.makedirs(optimize_images.OUTPUT_DIR, exist_ok=True)
+    optimize_images.save_manifest(manifest)
+    if failures:
+        raise failures[0]
+    elapsed = time.perf_counter() - start_time
+    instrumentation.emit('pipeline', seconds=round(elapsed, 3),
+                         downloaded=download_stage.items, images=optimize_stage.items,
+                         queue_max=max(download_stage.depth_samples, default=0))
+
+    print()
+    print(f"⏱️  Pipeline stages ({elapsed:.1f}s total):")
+    download_stage.report()
+    optimize_stage.report()
+    if format_totals:
+        optimize_images.report_format_totals(format_totals)
+    print()
+
+    # Catch up on anything not streamed (already-downloaded images, setting
+    # changes) and prune outputs of removed photos
+    optimize_images.process_all_images(workers=workers)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sync from Drive and optimize photos as they arrive")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Optimize worker processes (default: CPU count)")
+    parser.add_argument('--concurrency', type=int, default=sync_from_drive.DEFAULT_CONCURRENCY,
+                        help=f"Parallel downloads (default: {sync_from_drive.DEFAULT_CONCURRENCY})")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Max images waiting between stages (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--chunk-size', type=float,
+                        default=sync_from_drive.DEFAULT_CHUNK_SIZE / (1024 * 1024),
+                        help="Download chunk size in MB (default: %(default)s)")
+    parser.add_argument('--per-folder', action='store_true',
+                        help="List each category with its own query instead of batching them")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the saved sync state and re-list everything")
+    optimize_images.add_arguments(parser)
+    imaging.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts pipeline`"""
+    args = parse_args(argv)
+    optimize_images.configure_from_args(args)
+    imaging.configure_from_args(args)
+    instrumentation.configure_from_args(args)
+    run_pipeline(workers=max(1, args.workers),
+                 concurrency=max(1, args.concurrency),
+                 queue_size=max(1, args.queue_size),
+                 chunk_size=max(256 * 1024, int(args.chunk_size * 1024 * 1024)),
+                 single_query=not args.per_folder,
+                 full=args.full)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Preview Server
+Serves src/ with a data.json generated live from photos/, resizing and
+converting each image (HEIC included) the first time a width is asked for,
+so layout changes and new albums show up without a full build
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import imaging
+import inventory
+import optimize_images
+import generate_site
+
+# Preview Settings
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, '.preview_cache')
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DISK_CACHE_MB = 512          # Rendered images kept on disk across restarts
+MEMORY_CACHE_MB = 64         # Most recently served images kept in memory
+MIN_WIDTH = 16               # Smallest ?w= served
+WIDTH_STEP = 50              # Other ?w= values round up to a multiple of this, bounding the cache
+
+def published_name(file):
+    """Name optimize_images.py gives a source's JPEG output"""
+    return os.path.splitext(file)[0] + '.jpg'
+
+def render(input_path, width=None):
+    """JPEG bytes of a source, sized like optimize_image() or narrowed to width
+
+    Full-size renders use JPEG_QUALITY and narrower ones DERIVATIVE_QUALITY,
+    so the preview looks like the built site.
+    """
+    backend = imaging.get_backend()
+    source, target, _ = optimize_images.open_within_budget(backend, input_path, width)
+    with source:
+        narrowed = target != optimize_images.output_size(*source.size)
+        quality = optimize_images.DERIVATIVE_QUALITY if narrowed else optimize_images.JPEG_QUALITY
+        img = source.load(flatten=True)
+        if backend.size(img) != target:
+            img = backend.resize(img, target, reducing_gap=imaging.RESIZE_REDUCING_GAP)
+        return backend.to_bytes(img, 'JPEG', quality)
+
+class DerivativeCache:
+    """Size-bounded LRU of rendered images, in memory and on disk
+
+    Both tiers evict least recently used entries first. Disk entries are
+    <key>.jpg files whose mtime is bumped on every hit, so the order
+    survives a restart.
+    """
+
+    def __init__(self, directory, disk_mb=DISK_CACHE_MB, memory_mb=MEMORY_CACHE_MB):
+        self.directory = directory
+        self.disk_limit = disk_mb * 1024 * 1024
+        self.memory_limit = memory_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()   # key → bytes, oldest first
+        self.memory_size = 0
+        self.disk = OrderedDict()     # key → file size, oldest first
+        self.disk_size = 0
+        self.hits = self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith('.jpg'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-len('.jpg')], stat.st_size))
+                elif entry.name.endswith('.tmp'):
+                    os.remove(entry.path)  # Interrupted write
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_size += size
+        self._remove(self._trim_disk())
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, key):
+        """Cached bytes for key, or None"""
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                if key in self.disk:
+                    self.disk.move_to_end(key)
+                self.hits += 1
+                return data
+            on_disk = key in self.disk
+            if on_disk:
+                self.disk.move_to_end(key)
+
+        if on_disk:
+            try:
+                with open(self.path(key), 'rb') as f:
+                    data = f.read()
+                os.utime(self.path(key))
+            except OSError:
+                data = None  # Evicted by another request meanwhile
+        with self.lock:
+            if data is None:
+                if key in self.disk:
+                    self.disk_size -= self.disk.pop(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """Store data under key in both tiers, evicting as needed"""
+        tmp_path = self.path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path(key))
+        with self.lock:
+            self.disk_size += len(data) - self.disk.pop(key, 0)
+            self.disk[key] = len(data)
+            evicted = self._trim_disk()
+            self._remember(key, data)
+        self._remove(evicted)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.disk), 'disk_mb': self.disk_size / (1024 * 1024),
+                    'memory_mb': self.memory_size / (1024 * 1024),
+                    'hits': self.hits, 'misses': self.misses}
+
+    def _remember(self, key, data):
+        """Add to the memory tier (lock held); oversized images stay disk-only"""
+        if len(data) > self.memory_limit:
+            return
+        self.memory_size += len(data) - len(self.memory.pop(key, b''))
+        self.memory[key] = data
+        while self.memory_size > self.memory_limit:
+            _, old = self.memory.popitem(last=False)
+            self.memory_size -= len(old)
+
+    def _trim_disk(self):
+        """Drop the oldest disk entries over the limit (lock held); returns their keys"""
+        evicted = []
+        while self.disk_size > self.disk_limit and len(self.disk) > 1:
+            key, size = self.disk.popitem(last=False)
+            self.disk_size -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove(self, keys):
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+class Library:
+    """photos/ laid out the way the built site publishes it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources = {}   # published "<category>/<name>.jpg" → source "<category>/<file>"
+        self.sizes = {}     # source → ((size, mtime_ns), output (width, height))
+
+    def scan(self):
+        """Re-list photos/, refreshing the published name → source map"""
+        photos = inventory.Inventory(optimize_images.INPUT_DIR)
+        sources = {}
+        for category in photos.categories():
+            for file in photos.listdir(category):
+                if os.path.splitext(file.lower())[1] in optimize_images.SUPPORTED_FORMATS:
+                    # IMG_1.HEIC and IMG_1.jpg publish the same name; the first wins, as in a build
+                    sources.setdefault(f"{category}/{published_name(file)}", f"{category}/{file}")
+
+        # The profile picture sits in photos/ itself and keeps its name
+        profile_pic = load_config().get('profile_picture')
+        if profile_pic and photos.stat(profile_pic):
+            sources[profile_pic] = profile_pic
+        with self.lock:
+            self.sources = sources
+        return photos, sources
+
+    def source(self, published):
+        """Source path for a published image path, re-scanning once on a miss"""
+        with self.lock:
+            source = self.sources.get(published)
+        if source is None:
+            source = self.scan()[1].get(published)
+        return source
+
+    def output_size(self, source, input_path, stat):
+        """Size optimize_image() would give source (header read, cached by size/mtime)"""
+        state = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            cached = self.sizes.get(source)
+        if cached and cached[0] == state:
+            return cached[1]
+        with imaging.get_backend().open(input_path) as opened:
+            size = optimize_images.output_size(*opened.size)
+        with self.lock:
+            self.sizes[source] = (state, size)
+        return size
+
+    def portfolio(self):
+        """data.json payload (generate_site.py's single-file layout) for photos/ as it is now"""
+        photos, sources = self.scan()
+        drive_links = generate_site.load_drive_links()
+        link_index = generate_site.build_drive_link_index(drive_links)
+        link_issues = {'ambiguous': [], 'missing': [], 'legacy': {}}
+
+        tabs = []
+        for published, source in sources.items():
+            category, _, name = published.rpartition('/')
+            if not category:
+                continue  # Profile picture
+            try:
+                width, height = self.output_size(source, photos.path(source), photos.stat(source))
+            except Exception as e:
+                print(f"   ⚠️  Could not read {source}: {e}")
+                continue
+            if not tabs or tabs[-1]["category"] != category:
+                tabs.append({"category": category, "images": []})
+            tabs[-1]["images"].append({
+                "name": name,
+                "path": f"images/{published}",
+                "drive_url": generate_site.resolve_drive_link(drive_links, link_index, category,
+                                                              name, link_issues),
+                "width": width,
+                "height": height,
+                "orientation": ('landscape' if width > height else
+                                'portrait' if height > width else 'square'),
+                "variants": [
+                    {"width": variant, "path": f"images/{category}/w{variant}/{name}"}
+                    for variant in sorted(optimize_images.DERIVATIVE_WIDTHS) if variant < width
+                ],
+            })
+
+        all_images = [image for tab in tabs for image in tab["images"]]
+        random.shuffle(all_images)
+        return generate_site.single_data({"tabs": tabs, "all_images": all_images})
+
+def load_config():
+    """config.json, or {} while it's missing or invalid (the preview keeps serving)"""
+    try:
+        return generate_site.load_config()
+    except (Exception, SystemExit):
+        return {}
+
+def render_settings():
+    """Settings baked into every rendered image (part of each cache key)"""
+    return (imaging.backend_name(), optimize_images.MAX_WIDTH, optimize_images.MAX_HEIGHT,
+            optimize_images.JPEG_QUALITY, optimize_images.DERIVATIVE_QUALITY)
+
+def snap_width(width):
+    """Clamp a requested width and round it up to a cacheable step
+
+    The upper clamp (a source's output width) is applied per image in
+    send_image().
+    """
+    if width is None or width in optimize_images.DERIVATIVE_WIDTHS:
+        return width
+    return -(-max(MIN_WIDTH, width) // WIDTH_STEP) * WIDTH_STEP
+
+class PreviewServer(ThreadingHTTPServer):
+    """HTTP server with the library, cache and render workers the handlers share"""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers, cache):
+        super().__init__(address, PreviewHandler)
+        self.library = Library()
+        self.cache = cache
+        # Decode, resize and encode run in C with the GIL released, so threads scale
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+        self.inflight = {}   # cache key → Future; concurrent requests share one render
+        self.inflight_lock = threading.Lock()
+        self.settings = render_settings()
+
+    def image(self, key, input_path, width):
+        """Rendered bytes for key from the cache or a render worker"""
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = self.pool.submit(render, input_path, width)
+        if not owner:
+            return future.result()
+        try:
+            start = time.perf_counter()
+            data = future.result()
+            self.cache.put(key, data)
+            size = f"w{width}" if width else "full"
+            print(f"   🖼️  {os.path.relpath(input_path, optimize_images.INPUT_DIR)} {size} "
+                  f"({len(data) / 1024:.0f} KB, {time.perf_counter() - start:.2f}s)")
+            return data
+        finally:
+            with self.inflight_lock:
+                self.inflight.pop(key, None)
+
+    def handle_error(self, request, client_address):
+        # Recycled gallery tiles abort their image requests; that's not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """src/ as static files, plus the live index.html, data.json and images/"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=generate_site.SRC_DIR, **kwargs)
+
+    def end_headers(self):
+        # Everything can change between reloads; images revalidate by ETag
+        self.send_header('Cache-Control', 'no-cache')
+        super().end_headers()
+
+    def log_request(self, code='-', size='-'):
+        pass  # Renders and errors are reported; every tile request would drown them
+
+    def do_GET(self):
+        self.dispatch(send_body=True)
+
+    def do_HEAD(self):
+        self.dispatch(send_body=False)
+
+    def dispatch(self, send_body):
+        """Route GET and HEAD alike; HEAD gets the same headers and no body"""
+        self.send_body = send_body
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        try:
+            if path in ('/', '/index.html'):
+                self.send_index()
+            elif path == '/data.json':
+                self.send_data()
+            elif path.startswith('/images/'):
+                self.send_image(path[len('/images/'):], parse_qs(url.query))
+            elif send_body:
+                super().do_GET()
+            else:
+                super().do_HEAD()
+        except ConnectionError:
+            pass
+
+    def send_bytes(self, data, content_type, etag=None):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if self.send_body:
+            self.wfile.write(data)
+
+    def send_index(self):
+        config = load_config()
+        if not config:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "config.json is missing or invalid")
+            return
+        content = generate_site.render_index(config)
+        if content is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "src/index.html not found")
+            return
+        self.send_bytes(content.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def send_data(self):
+        start = time.perf_counter()
+        data = self.server.library.portfolio()
+        images = sum(len(tab["images"]) for tab in data["tabs"])
+        print(f"   📄 data.json: {images} images in {len(data['tabs'])} categories "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        self.send_bytes(generate_site.dump_compact(data).encode('utf-8'), 'application/json')
+
+    def send_image(self, rel_path, query):
+        """images/<category>/[w<width>/]<name>, or any of them with ?w=<width>"""
+        parts = rel_path.split('/')
+        width = None
+        if len(parts) == 3 and re.fullmatch(r'w\d+', parts[1]):
+            width = int(parts.pop(1)[1:])
+        if 'w' in query:
+            if not query['w'][0].isdigit():
+                self.send_error(HTTPStatus.BAD_REQUEST, "w must be a width in pixels")
+                return
+            width = int(query['w'][0])
+        width = snap_width(width)
+
+        source = self.server.library.source('/'.join(parts))
+        input_path = os.path.join(optimize_images.INPUT_DIR, *source.split('/')) if source else None
+        try:
+            stat = os.stat(input_path) if input_path else None
+        except OSError:
+            stat = None
+        if not stat:
+            self.send_error(HTTPStatus.NOT_FOUND, f"No photo for {rel_path}")
+            return
+        try:
+            # Any wider request is the full-size render; don't cache copies of it per width
+            library = self.server.library
+            if width is not None and width >= library.output_size(source, input_path, stat)[0]:
+                width = None
+        except Exception as e:
+            print(f"   ⚠️  Could not read {source}: {e}")
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Failed to render {source}")
+            return
+
+        key = hashlib.sha256(repr((source, stat.st_size, stat.st_mtime_ns, width,
+                                   self.server.settings)).encode('utf-8')).hexdigest()[:32]
+        etag = f'"{key}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        try:
+            data = self.server.image(key, input_path, width)
+        except Exception as e:
+            print(f"   ⚠️  Failed to render {source}: {e}")
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Failed to render {source}")
+            return
+        self.send_bytes(data, 'image/jpeg', etag)
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1,
+          disk_mb=DISK_CACHE_MB, memory_mb=MEMORY_CACHE_MB):
+    """Run the preview server until interrupted"""
+    cache = DerivativeCache(CACHE_DIR, disk_mb, memory_mb)
+    server = PreviewServer((host, port), workers, cache)
+    stats = cache.stats()
+
+    print("🔭 Portfolio Preview")
+    print(f"   Photos: {optimize_images.INPUT_DIR}")
+    print(f"   Backend: {imaging.backend_name()}, {workers} render workers")
+    print(f"   Cache: {stats['entries']} images, {stats['disk_mb']:.0f}/{disk_mb} MB on disk, "
+          f"{memory_mb} MB in memory")
+    print(f"   Serving: http://{host}:{server.server_address[1]}  (Ctrl+C to stop)")
+    print()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown(wait=False, cancel_futures=True)
+        stats = cache.stats()
+        print(f"\n👋 Preview stopped ({stats['hits']} cache hits, {stats['misses']} renders)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Preview the site straight from photos/, without building")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f"Interface to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Images rendered at once (default: CPU count)")
+    parser.add_argument('--cache-mb', type=int, default=DISK_CACHE_MB,
+                        help=f"Disk cache size in MB (default: {DISK_CACHE_MB})")
+    parser.add_argument('--memory-mb', type=int, default=MEMORY_CACHE_MB,
+                        help=f"Memory cache size in MB (default: {MEMORY_CACHE_MB})")
+    imaging.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts preview`"""
+    args = parse_args(argv)
+    imaging.configure_from_args(args)
+    serve(host=args.host, port=args.port, workers=max(1, args.workers),
+          disk_mb=max(1, args.cache_mb), memory_mb=max(0, args.memory_mb))
+
+if __name__ == '__main__':
+    cli()
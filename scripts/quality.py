@@ -0,0 +1,91 @@
+"""
+Perceptual Quality
+Structural similarity (SSIM) between images' luma and chroma planes and
+the search for the lowest encoder quality that still meets an SSIM target
+"""
+
+from operator import mul
+
+BLOCK = 8                    # SSIM window size
+CELL = 4                     # Window stride: windows straddle JPEG's 8x8 DCT grid, so
+                             # blocking edges count against the score
+C1 = (0.01 * 255) ** 2       # Stabilizers from the SSIM paper for 8-bit data
+C2 = (0.03 * 255) ** 2
+PLANE_WEIGHTS = (0.8, 0.1, 0.1)  # Y, Cb, Cr in ssim_planes()
+
+def _cell_sums(width, height, a, b):
+    """Σx, Σy, Σx², Σy², Σxy for each CELL x CELL cell, as rows of cells"""
+    cols = width // CELL
+    grid = []
+    for row in range(height // CELL):
+        sums = [[0, 0, 0, 0, 0] for _ in range(cols)]
+        for y in range(row * CELL, (row + 1) * CELL):
+            offset = y * width
+            for col in range(cols):
+                start = offset + col * CELL
+                xs = a[start:start + CELL]
+                ys = b[start:start + CELL]
+                s = sums[col]
+                s[0] += sum(xs)
+                s[1] += sum(ys)
+                s[2] += sum(map(mul, xs, xs))
+                s[3] += sum(map(mul, ys, ys))
+                s[4] += sum(map(mul, xs, ys))
+        grid.append(sums)
+    return grid
+
+def _window_ssim(n, sx, sy, sxx, syy, sxy):
+    mx, my = sx / n, sy / n
+    vx, vy = sxx / n - mx * mx, syy / n - my * my
+    cov = sxy / n - mx * my
+    return (((2 * mx * my + C1) * (2 * cov + C2))
+            / ((mx * mx + my * my + C1) * (vx + vy + C2)))
+
+def ssim(reference, candidate):
+    """Mean SSIM of two same-size single-channel images, 1.0 = identical
+
+    Each image is (width, height, pixels) with one byte per pixel. Windows
+    are BLOCK x BLOCK at a CELL stride (so they overlap and cross JPEG block
+    edges), built from per-cell sums; a trailing partial cell is left out.
+    Images smaller than a window are compared as a single window.
+    """
+    width, height, a = reference
+    _, _, b = candidate
+    if width < BLOCK or height < BLOCK:
+        return _window_ssim(width * height, sum(a), sum(b), sum(map(mul, a, a)),
+                            sum(map(mul, b, b)), sum(map(mul, a, b)))
+    grid = _cell_sums(width, height, a, b)
+    n = BLOCK * BLOCK
+    total = 0.0
+    windows = 0
+    for upper, lower in zip(grid, grid[1:]):
+        for col in range(len(upper) - 1):
+            total += _window_ssim(n, *map(sum, zip(upper[col], upper[col + 1],
+                                                  lower[col], lower[col + 1])))
+            windows += 1
+    return total / windows
+
+def ssim_planes(reference, candidate):
+    """PLANE_WEIGHTS-weighted SSIM of matching (Y, Cb, Cr) plane lists
+
+    Chroma planes catch the colour bleeding and banding that luma alone
+    misses at low JPEG qualities.
+    """
+    return sum(weight * ssim(ref, cand)
+               for weight, ref, cand in zip(PLANE_WEIGHTS, reference, candidate))
+
+def lowest_quality(measure, target, low, high):
+    """Binary search for the lowest quality in [low, high] scoring >= target
+
+    measure(quality) returns the SSIM at that quality, which is assumed to
+    rise with quality. If even high misses the target, high is returned.
+    """
+    if measure(high) < target:
+        return high
+    while low < high:
+        mid = (low + high) // 2
+        if measure(mid) >= target:
+            high = mid
+        else:
+            low = mid + 1
+    return high
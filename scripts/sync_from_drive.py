@@ -1,9 +1,14 @@
 import os
-import io
 import json
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2 import service_account
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import instrumentation
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,138 +32,587 @@ def load_config():
         
     return config
 
-# Load parent folder ID from config
-config = load_config()
-PARENT_FOLDER_ID = config['google_drive_folder_id']
+_config = None
+
+def parent_folder_id():
+    """Drive folder holding the category folders, from config.json on first use"""
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config['google_drive_folder_id']
+
+def __getattr__(name):
+    # config and PARENT_FOLDER_ID used to be loaded at import time
+    if name == 'PARENT_FOLDER_ID':
+        return parent_folder_id()
+    if name == 'config':
+        parent_folder_id()
+        return _config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
-def authenticate():
-    """Authenticates using the Service Account."""
+# Download Settings
+DEFAULT_CONCURRENCY = 4                 # Parallel downloads
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024    # Bytes per ranged request
+MAX_RETRIES = 5                         # Attempts per chunk on 429/5xx/network errors
+RETRY_BASE_DELAY = 1.0                  # Seconds, doubled on every retry
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+PARTIAL_SUFFIX = '.part'                # In-progress downloads; renamed when complete
+
+# Listing Settings
+PAGE_SIZE = 1000                        # Max results per files.list page (Drive's limit)
+FOLDERS_PER_QUERY = 40                  # Parent ids OR'ed into one batched image query
+IMAGE_FIELDS = "id, name, mimeType, webViewLink, size, md5Checksum, modifiedTime, parents"
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Delta Sync State (file id → name, md5, modifiedTime, local path + changes token)
+SYNC_STATE_PATH = os.path.join(LOCAL_PHOTOS_DIR, '.sync_state.json')
+SYNC_STATE_VERSION = 1
+CHANGE_FIELDS = f"nextPageToken, newStartPageToken, changes(fileId, removed, file({IMAGE_FIELDS}, trashed))"
+
+def load_credentials():
+    """Loads Service Account credentials, or None if the key file is missing."""
     if not os.path.exists(SERVICE_ACCOUNT_FILE):
         print(f"❌ Error: {SERVICE_ACCOUNT_FILE} not found!")
         print("   Please ensure your Google Drive credentials file exists.")
         return None
     
-    creds = service_account.Credentials.from_service_account_file(
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_file(
         SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    return build('drive', 'v3', credentials=creds)
 
-def get_folders(service, parent_id):
+def build_service(creds):
+    """Builds a Drive client. Clients aren't thread-safe: build one per thread."""
+    from googleapiclient.discovery import build
+    return build('drive', 'v3', credentials=creds, cache_discovery=False)
+
+def authenticate():
+    """Authenticates using the Service Account."""
+    creds = load_credentials()
+    if not creds:
+        return None
+    return build_service(creds)
+
+def list_files(service, query, fields, stats=None):
+    """Runs a files.list query, following nextPageToken until exhausted.
+
+    If given, stats['requests'] is incremented once per page fetched.
+    """
+    files = []
+    page_token = None
+    while True:
+        results = service.files().list(
+            q=query, fields=f"nextPageToken, files({fields})",
+            pageSize=PAGE_SIZE, pageToken=page_token).execute()
+        if stats is not None:
+            stats['requests'] = stats.get('requests', 0) + 1
+        files.extend(results.get('files', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return files
+
+def get_folders(service, parent_id, stats=None):
     """Gets subfolders (your categories: Nature, Street, etc.)"""
-    query = f"'{parent_id}' in parents and mimeType = 'application/vnd.google-apps.folder' and trashed = false"
-    results = service.files().list(q=query, fields="files(id, name)").execute()
-    return results.get('files', [])
+    query = f"'{parent_id}' in parents and mimeType = '{FOLDER_MIME_TYPE}' and trashed = false"
+    return list_files(service, query, "id, name", stats)
 
-def get_images(service, folder_id):
+def get_images(service, folder_id, stats=None):
     """Gets images inside a specific folder."""
-    # Modified to include webViewLink
     query = f"'{folder_id}' in parents and mimeType contains 'image/' and trashed = false"
-    fields = "files(id, name, mimeType, webViewLink)"
-    results = service.files().list(q=query, fields=fields).execute()
-    return results.get('files', [])
+    return list_files(service, query, IMAGE_FIELDS, stats)
+
+def get_images_by_folder(service, folder_ids, stats=None):
+    """Gets images for many folders with a few batched queries.
+
+    Parent ids are OR'ed together (FOLDERS_PER_QUERY at a time) and the
+    results grouped client-side by parent, so listing costs a handful of
+    requests instead of one paginated query per category.
+    """
+    images_by_folder = {folder_id: [] for folder_id in folder_ids}
+    for i in range(0, len(folder_ids), FOLDERS_PER_QUERY):
+        batch = folder_ids[i:i + FOLDERS_PER_QUERY]
+        parents = " or ".join(f"'{folder_id}' in parents" for folder_id in batch)
+        query = f"({parents}) and mimeType contains 'image/' and trashed = false"
+        for image in list_files(service, query, IMAGE_FIELDS, stats):
+            for parent in image.get('parents', []):
+                if parent in images_by_folder:
+                    images_by_folder[parent].append(image)
+    return images_by_folder
+
+def http_status(error):
+    """HTTP status of a googleapiclient HttpError (or a fake with .resp.status)"""
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    return int(status) if status is not None else None
 
-def download_file(service, file_id, destination_path):
-    """Downloads a file from Google Drive."""
+def is_retryable(error):
+    """Rate limits, server errors and dropped connections are worth retrying."""
+    status = http_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, (OSError, TimeoutError))
+
+def fetch_range(service, file_id, start, end):
+    """Fetches bytes [start, end] of a file, retrying with exponential backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            request = service.files().get_media(fileId=file_id)
+            request.headers['Range'] = f"bytes={start}-{end}"
+            return request.execute()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random())
+            time.sleep(delay)
+
+def download_file(service, file_id, destination_path, expected_size=None,
+                  md5_checksum=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Downloads a file from Google Drive.
+
+    Bytes go to <destination>.part in chunk_size ranged requests and the file
+    is renamed into place only once complete (and its md5 matches, when
+    known), so an interrupted transfer never looks finished. An existing
+    .part file is resumed from its current size.
+    """
+    partial_path = destination_path + PARTIAL_SUFFIX
     try:
-        request = service.files().get_media(fileId=file_id)
-        
         # Create parent directory if it doesn't exist
         os.makedirs(os.path.dirname(destination_path), exist_ok=True)
         
-        # Download the file
-        with io.FileIO(destination_path, 'wb') as fh:
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        if expected_size is not None and offset > expected_size:
+            offset = 0  # Stale partial from an older version of the file
+        
+        with open(partial_path, 'ab' if offset else 'wb') as fh:
+            while expected_size is None or offset < expected_size:
+                try:
+                    chunk = fetch_range(service, file_id, offset, offset + chunk_size - 1)
+                except Exception as e:
+                    # Range past the end: the partial already held every byte
+                    if http_status(e) == 416 and offset > 0:
+                        break
+                    raise
+                fh.write(chunk)
+                offset += len(chunk)
+                if len(chunk) < chunk_size:
+                    break
         
+        if expected_size is not None and offset != expected_size:
+            raise IOError(f"expected {expected_size} bytes, got {offset}")
+        if md5_checksum and file_md5(partial_path) != md5_checksum:
+            os.remove(partial_path)
+            raise IOError("md5 checksum mismatch")
+        
+        os.replace(partial_path, destination_path)
         return True
     except Exception as e:
-        print(f"   ⚠️  Error downloading: {e}")
+        print(f"   ⚠️  Error downloading {os.path.basename(destination_path)}: {e}")
+        return False
+
+def file_md5(path):
+    """MD5 of a file's contents (Drive reports md5Checksum for binary files)."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def download_all(jobs, service_factory, concurrency=DEFAULT_CONCURRENCY,
+                 chunk_size=DEFAULT_CHUNK_SIZE, on_downloaded=None):
+    """Downloads jobs on a bounded thread pool.
+
+    Each job is a (label, file dict, destination path) tuple. service_factory
+    is called once per worker thread, since Drive clients can't be shared
+    across threads; pass a factory returning a fake service to test offline.
+    on_downloaded(destination_path), if given, is called from the worker
+    thread right after each successful download, so a blocking callback
+    (e.g. a bounded queue's put) holds back further downloads.
+    Yields (job, ok) as each download finishes.
+    """
+    local = threading.local()
+
+    def run(job):
+        if not hasattr(local, 'service'):
+            local.service = service_factory()
+        label, image, destination_path = job
+        size = image.get('size')
+        start = time.perf_counter()
+        ok = download_file(local.service, image['id'], destination_path,
+                           expected_size=int(size) if size is not None else None,
+                           md5_checksum=image.get('md5Checksum'),
+                           chunk_size=chunk_size)
+        instrumentation.emit('download', stage='sync', image=label, ok=ok,
+                             bytes_in=os.path.getsize(destination_path) if ok else 0,
+                             seconds=round(time.perf_counter() - start, 4))
+        if ok and on_downloaded:
+            on_downloaded(destination_path)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(run, job): job for job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def is_complete(local_path, image):
+    """A local file counts as synced if it exists and matches Drive's size."""
+    if not os.path.exists(local_path):
+        return False
+    size = image.get('size')
+    return size is None or os.path.getsize(local_path) == int(size)
+
+def load_sync_state():
+    """Loads the sync state for parent_folder_id(), or None if there isn't one."""
+    if not os.path.exists(SYNC_STATE_PATH):
+        return None
+    try:
+        with open(SYNC_STATE_PATH, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable sync state {SYNC_STATE_PATH}: {e}")
+        return None
+    if state.get('version') != SYNC_STATE_VERSION or state.get('parent_id') != parent_folder_id():
+        return None
+    return state
+
+def save_sync_state(state):
+    """Writes the sync state atomically."""
+    tmp_path = SYNC_STATE_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, SYNC_STATE_PATH)
+
+def file_record(image, category_name):
+    """The sync state entry for a Drive image in a category folder."""
+    return {
+        'name': image['name'],
+        'md5Checksum': image.get('md5Checksum'),
+        'modifiedTime': image.get('modifiedTime'),
+        'size': image.get('size'),
+        'webViewLink': image.get('webViewLink', ''),
+        'local_path': f"{category_name}/{image['name']}",
+    }
+
+def get_start_page_token(service):
+    """Token marking "now" in the Drive changes feed."""
+    return service.changes().getStartPageToken().execute()['startPageToken']
+
+def list_changes(service, page_token, stats=None):
+    """Fetches every change since page_token; returns (changes, new token)."""
+    changes = []
+    while True:
+        results = service.changes().list(
+            pageToken=page_token, spaces='drive', includeRemoved=True,
+            pageSize=PAGE_SIZE, fields=CHANGE_FIELDS).execute()
+        if stats is not None:
+            stats['requests'] = stats.get('requests', 0) + 1
+        changes.extend(results.get('changes', []))
+        if 'newStartPageToken' in results:
+            return changes, results['newStartPageToken']
+        page_token = results['nextPageToken']
+
+def apply_changes(files, folders, changes):
+    """Applies Drive changes to a copy of the state's file records.
+
+    Returns the updated records, or None when a category folder itself was
+    added, renamed or removed, which needs a full listing to resolve.
+    """
+    files = dict(files)
+    for change in changes:
+        file_id = change['fileId']
+        image = change.get('file') or {}
+        
+        if image.get('mimeType') == FOLDER_MIME_TYPE or (change.get('removed') and file_id in folders):
+            if file_id in folders or parent_folder_id() in image.get('parents', []):
+                return None
+            continue
+        
+        parent = next((p for p in image.get('parents', []) if p in folders), None)
+        gone = (change.get('removed') or image.get('trashed')
+                or not image.get('mimeType', '').startswith('image/'))
+        if gone or parent is None:
+            files.pop(file_id, None)
+        else:
+            files[file_id] = file_record(image, folders[parent])
+    return files
+
+def list_all_images(service, single_query, stats):
+    """Full listing: returns ({folder id: name}, {file id: record})."""
+    folders = get_folders(service, parent_folder_id(), stats)
+    
+    if single_query:
+        images_by_folder = get_images_by_folder(
+            service, [folder['id'] for folder in folders], stats)
+    else:
+        images_by_folder = {folder['id']: get_images(service, folder['id'], stats)
+                            for folder in folders}
+    
+    files = {}
+    for folder in folders:
+        for image in images_by_folder.get(folder['id'], []):
+            files[image['id']] = file_record(image, folder['name'])
+    return {folder['id']: folder['name'] for folder in folders}, files
+
+def needs_download(record, previous, local_path):
+    """Whether a remote file has to be (re)downloaded to local_path."""
+    if not is_complete(local_path, record):
+        return True
+    if previous is None:
+        return False  # Pre-existing local copy of the right size
+    if previous.get('pending'):
+        return True   # An earlier download of this version failed
+    return previous.get('md5Checksum') != record.get('md5Checksum')
+
+def split_exact_duplicates(downloads, files):
+    """Split download jobs into (downloads, copies) by md5Checksum
+
+    A job whose bytes already exist locally, or that another job is about
+    to download, becomes a copy: its file dict gains copy_from, the source
+    record's local_path.
+    """
+    pending = {job[1]['id'] for job in downloads}
+    sources = {}
+    for file_id, record in files.items():
+        md5 = record.get('md5Checksum')
+        if md5 and file_id not in pending and md5 not in sources and \
+                is_complete(os.path.join(LOCAL_PHOTOS_DIR, record['local_path']), record):
+            sources[md5] = record['local_path']
+    
+    remaining = []
+    copies = []
+    for label, image, destination_path in downloads:
+        md5 = image.get('md5Checksum')
+        if md5 and md5 in sources:
+            copies.append((label, dict(image, copy_from=sources[md5]), destination_path))
+        else:
+            remaining.append((label, image, destination_path))
+            if md5:
+                sources[md5] = image['local_path']
+    return remaining, copies
+
+def copy_local(source_path, destination_path, image):
+    """Copy an already-synced file into place, checking its md5"""
+    partial_path = destination_path + PARTIAL_SUFFIX
+    try:
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        shutil.copyfile(source_path, partial_path)
+        if file_md5(partial_path) != image.get('md5Checksum'):
+            os.remove(partial_path)
+            return False
+        os.replace(partial_path, destination_path)
+        return True
+    except OSError as e:
+        print(f"   ⚠️  Error copying {os.path.basename(destination_path)}: {e}")
         return False
 
-def sync_photos():
-    """Main sync function - downloads all photos from Google Drive."""
+def sync_photos(concurrency=DEFAULT_CONCURRENCY, chunk_size=DEFAULT_CHUNK_SIZE,
+                single_query=True, full=False, on_downloaded=None, creds=None, service=None):
+    """Main sync function - downloads all photos from Google Drive.
+
+    The first run (or --full) lists every category; later runs replay only
+    the Drive changes since the saved start page token, then download new or
+    modified files, rename moved ones locally and delete removed ones.
+    on_downloaded is passed through to download_all(). A long-running caller
+    can pass creds and service to skip re-authenticating on every call.
+    """
+    with instrumentation.stage('sync', concurrency=concurrency) as stage:
+        _sync_photos(stage, concurrency, chunk_size, single_query, full, on_downloaded,
+                     creds, service)
+
+def _sync_photos(stage, concurrency, chunk_size, single_query, full, on_downloaded,
+                 creds, service):
+    """sync_photos() body; counters go on stage for its stage_end event"""
     print("🔄 Google Drive Photo Sync")
     print("=" * 50)
     print()
     
     # Authenticate
-    service = authenticate()
-    if not service:
+    creds = creds or load_credentials()
+    if not creds:
         return
+    service = service or build_service(creds)
     
     print(f"✅ Connected to Google Drive")
-    print(f"📂 Parent Folder ID: {PARENT_FOLDER_ID}")
+    print(f"📂 Parent Folder ID: {parent_folder_id()}")
     print()
     
     # Create local photos directory
     os.makedirs(LOCAL_PHOTOS_DIR, exist_ok=True)
     
-    # Link mapping dictionary
-    drive_links = {}
+    state = None if full else load_sync_state()
+    previous_files = state['files'] if state else {}
+    listing_stats = {}
+    listing_start = time.perf_counter()
+    files = None
     
-    # Get all category folders
-    folders = get_folders(service, PARENT_FOLDER_ID)
+    # Delta sync: replay changes since the last run
+    if state:
+        changes, page_token = list_changes(service, state['start_page_token'], listing_stats)
+        folders = state['folders']
+        files = apply_changes(previous_files, folders, changes)
+        if files is None:
+            print("📋 Category folders changed - falling back to a full listing")
+        else:
+            print(f"📋 Delta sync: {len(changes)} changes since last run "
+                  f"({listing_stats.get('requests', 0)} requests, "
+                  f"{time.perf_counter() - listing_start:.2f}s)")
     
-    if not folders:
-        print("❌ No category folders found in Google Drive!")
-        print(f"   Check that folder ID '{PARENT_FOLDER_ID}' is correct.")
-        return
+    # Full sync: take the token first so nothing between listing and saving is missed
+    if files is None:
+        page_token = get_start_page_token(service)
+        folders, files = list_all_images(service, single_query, listing_stats)
+        
+        if not folders:
+            print("❌ No category folders found in Google Drive!")
+            print(f"   Check that folder ID '{parent_folder_id()}' is correct.")
+            return
+        
+        print(f"📋 Listed {len(files)} images in {len(folders)} categories "
+              f"({listing_stats.get('requests', 0)} requests, "
+              f"{time.perf_counter() - listing_start:.2f}s)")
+    print()
     
     total_downloaded = 0
     total_skipped = 0
+    total_failed = 0
+    total_renamed = 0
+    total_deleted = 0
+    bytes_downloaded = 0
+    downloads = []
     
-    # Process each category
-    for folder in folders:
-        category_name = folder['name']
-        category_id = folder['id']
-        
-        print(f"📂 Category: {category_name}")
+    # Delete local copies of files removed from Drive
+    for file_id in sorted(set(previous_files) - set(files)):
+        local_path = os.path.join(LOCAL_PHOTOS_DIR, previous_files[file_id]['local_path'])
+        if os.path.exists(local_path):
+            os.remove(local_path)
+            print(f"   🗑️  {previous_files[file_id]['local_path']} (removed from Drive)")
+            total_deleted += 1
+    
+    for file_id, record in sorted(files.items(), key=lambda item: item[1]['local_path']):
+        previous = previous_files.get(file_id)
+        local_path = os.path.join(LOCAL_PHOTOS_DIR, record['local_path'])
         
-        # Create local category directory
-        local_category_path = os.path.join(LOCAL_PHOTOS_DIR, category_name)
-        os.makedirs(local_category_path, exist_ok=True)
+        # Renamed or moved on Drive: move the local copy instead of re-downloading
+        if previous and previous['local_path'] != record['local_path']:
+            old_path = os.path.join(LOCAL_PHOTOS_DIR, previous['local_path'])
+            if os.path.exists(old_path):
+                if previous.get('md5Checksum') == record.get('md5Checksum'):
+                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                    os.replace(old_path, local_path)
+                    print(f"   ✏️  {previous['local_path']} → {record['local_path']}")
+                    total_renamed += 1
+                else:
+                    os.remove(old_path)
         
-        # Get images in this category
-        images = get_images(service, category_id)
+        if needs_download(record, previous, local_path):
+            downloads.append((record['local_path'], dict(record, id=file_id), local_path))
+        else:
+            total_skipped += 1
+    
+    # Byte-identical files (same md5) are downloaded once and copied locally
+    downloads, copies = split_exact_duplicates(downloads, files)
+    total_copied = 0
+    bytes_saved = 0
+    
+    # Download everything that's new, modified or incomplete
+    if downloads:
+        print(f"⬇️  Downloading {len(downloads)} images ({concurrency} at a time)...")
+        start_time = time.perf_counter()
         
-        for image in images:
-            image_name = image['name']
-            image_id = image['id']
-            # Store the Drive link
-            drive_links[image_name] = image.get('webViewLink', '')
-            
-            local_image_path = os.path.join(local_category_path, image_name)
-            
-            # Skip if already downloaded
-            if os.path.exists(local_image_path):
-                print(f"   ⏭️  {image_name} (already exists)")
-                total_skipped += 1
-                continue
-            
-            # Download the image
-            print(f"   ⬇️  {image_name}... ", end='', flush=True)
-            if download_file(service, image_id, local_image_path):
-                print("✅")
+        for (label, image, local_image_path), ok in download_all(
+                downloads, lambda: build_service(creds), concurrency, chunk_size,
+                on_downloaded):
+            if ok:
+                print(f"   ✅ {label}")
                 total_downloaded += 1
+                bytes_downloaded += os.path.getsize(local_image_path)
             else:
-                print("❌")
+                print(f"   ❌ {label}")
+                files[image['id']] = dict(files[image['id']], pending=True)
+                total_failed += 1
         
+        elapsed = time.perf_counter() - start_time
+        if elapsed > 0:
+            print(f"   {bytes_downloaded / (1024 * 1024) / elapsed:.2f} MB/s ({elapsed:.1f}s)")
         print()
     
-    # Save drive links
-    with open('drive_links.json', 'w') as f:
-        json.dump(drive_links, f, indent=4)
+    for label, image, local_image_path in copies:
+        source = os.path.join(LOCAL_PHOTOS_DIR, image['copy_from'])
+        if copy_local(source, local_image_path, image):
+            print(f"   📎 {label} (same file as {image['copy_from']})")
+            total_copied += 1
+            bytes_saved += os.path.getsize(local_image_path)
+            if on_downloaded:
+                on_downloaded(local_image_path)
+        else:
+            print(f"   ❌ {label}")
+            files[image['id']] = dict(files[image['id']], pending=True)
+            total_failed += 1
+    
+    save_sync_state({
+        'version': SYNC_STATE_VERSION,
+        'parent_id': parent_folder_id(),
+        'start_page_token': page_token,
+        'folders': folders,
+        'files': files,
+    })
+    
+    # Save drive links, keyed by "<category>/<name>" so same-named files in
+    # different categories don't overwrite each other
+    drive_links = {record['local_path']: record['webViewLink'] for record in files.values()}
+    content = json.dumps(drive_links, indent=4)
+    previous = None
+    if os.path.exists('drive_links.json'):
+        with open('drive_links.json', 'r') as f:
+            previous = f.read()
+    # Left untouched when nothing changed, so watchers don't see an edit
+    if content != previous:
+        with open('drive_links.json', 'w') as f:
+            f.write(content)
     print(f"✅ Saved drive links to drive_links.json")
+    stage.set(requests=listing_stats.get('requests', 0), images=len(files),
+              downloaded=total_downloaded, skipped=total_skipped, failed=total_failed,
+              renamed=total_renamed, deleted=total_deleted, bytes_in=bytes_downloaded,
+              copied=total_copied, bytes_saved=bytes_saved)
 
     print("=" * 50)
     print(f"✅ Sync Complete!")
     print(f"   Downloaded: {total_downloaded} images")
     print(f"   Skipped: {total_skipped} images (already exist)")
+    if total_copied:
+        print(f"   Copied: {total_copied} exact duplicates "
+              f"({bytes_saved / (1024 * 1024):.1f} MB not downloaded)")
+    if total_renamed:
+        print(f"   Renamed: {total_renamed} images")
+    if total_deleted:
+        print(f"   Deleted: {total_deleted} images (removed from Drive)")
+    if total_failed:
+        print(f"   Failed: {total_failed} images (partial downloads will resume next run)")
     print()
     print(f"📁 Photos saved to: {LOCAL_PHOTOS_DIR}/")
     print()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sync photos from Google Drive")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Parallel downloads (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--chunk-size', type=float, default=DEFAULT_CHUNK_SIZE / (1024 * 1024),
+                        help="Download chunk size in MB (default: %(default)s)")
+    parser.add_argument('--per-folder', action='store_true',
+                        help="List each category with its own query instead of batching them")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the saved sync state and re-list everything")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts sync`"""
+    args = parse_args(argv)
+    instrumentation.configure_from_args(args)
+    sync_photos(concurrency=max(1, args.concurrency),
+                chunk_size=max(256 * 1024, int(args.chunk_size * 1024 * 1024)),
+                single_query=not args.per_folder,
+                full=args.full)
+
 if __name__ == '__main__':
-    sync_photos()
+    cli()
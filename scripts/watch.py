@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Watch Mode
+Keeps the build warm in one process: polls Drive for changes, watches
+photos/, src/ and config.json, and rebuilds as soon as anything settles
+"""
+
+import os
+import time
+import argparse
+import subprocess
+from datetime import datetime
+
+import imaging
+import inventory
+import instrumentation
+import optimize_images
+import generate_site
+
+# Watch Settings
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DRIVE_POLL = 60      # Seconds between Drive change polls
+DEFAULT_INTERVAL = 2.0       # Seconds between local file scans
+DEFAULT_DEBOUNCE = 3.0       # Quiet seconds required before a rebuild starts
+RETRY_BACKOFF = 10.0         # Seconds before retrying a failed rebuild; doubles per failure
+MAX_RETRY_BACKOFF = 300.0
+SITE_INPUTS = [              # Changes here regenerate the site without re-optimizing
+    os.path.join(BASE_DIR, 'src'),
+    os.path.join(BASE_DIR, 'config.json'),
+    os.path.join(BASE_DIR, 'drive_links.json'),
+]
+
+def file_states(listing):
+    """{relative path: (size, mtime_ns)} for every file in an Inventory"""
+    return {rel_path: (stat.st_size, stat.st_mtime_ns) for rel_path, stat in listing.files.items()}
+
+def snapshot(path):
+    """file_states() of everything under path; a single file path is allowed
+
+    Hidden files (sync state, caches) and in-progress .part downloads are
+    left out of the Inventory, so they don't trigger rebuilds.
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return {os.path.basename(path): (stat.st_size, stat.st_mtime_ns)}
+    return file_states(inventory.Inventory(path))
+
+def changed_paths(before, after):
+    """Relative paths added, removed or modified between two snapshots"""
+    return sorted(key for key in set(before) | set(after) if before.get(key) != after.get(key))
+
+class DriveSync:
+    """Delta syncs that reuse one authenticated Drive client"""
+
+    def __init__(self, concurrency):
+        import sync_from_drive
+        self.sync_from_drive = sync_from_drive
+        self.concurrency = concurrency
+        self.creds = sync_from_drive.load_credentials()
+        self.service = sync_from_drive.build_service(self.creds) if self.creds else None
+
+    def poll(self):
+        if not self.service:
+            return
+        self.sync_from_drive.sync_photos(concurrency=self.concurrency,
+                                         creds=self.creds, service=self.service)
+
+def deploy():
+    """Commit and push the regenerated site, as deploy.sh does"""
+    subprocess.run(['git', 'add', '.'], cwd=BASE_DIR, check=True)
+    if subprocess.run(['git', 'diff', '--cached', '--quiet'], cwd=BASE_DIR).returncode == 0:
+        print("   ℹ️  No changes to commit")
+        return
+    message = f"Update portfolio - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    subprocess.run(['git', 'commit', '-m', message], cwd=BASE_DIR, check=True)
+    subprocess.run(['git', 'push', 'origin', 'main'], cwd=BASE_DIR, check=True)
+
+def rebuild(photos_changed, workers, push, photos=None):
+    """Re-optimize (only when photos changed) and regenerate the site
+
+    Both steps are incremental: the build manifest, metadata, fingerprint
+    and compression caches limit the work to the affected images and
+    categories, so nothing is re-encoded or re-copied needlessly. photos is
+    the latest Inventory of photos/, which optimizing reuses.
+    """
+    start = time.perf_counter()
+    with instrumentation.stage('rebuild', photos_changed=photos_changed):
+        if photos_changed:
+            optimize_images.process_all_images(workers=workers, photos=photos)
+        generate_site.main()
+        if push:
+            deploy()
+    print(f"⚡ Rebuilt in {time.perf_counter() - start:.1f}s — watching for changes...")
+
+def watch(workers, concurrency, drive_poll, interval, debounce, use_drive, push):
+    os.chdir(BASE_DIR)  # sync_from_drive writes drive_links.json to the cwd
+    print("👀 Portfolio Watch Mode")
+    print(f"   Watching: {optimize_images.INPUT_DIR}, src/, config.json")
+    print(f"   Drive polls: {'every ' + str(drive_poll) + 's' if use_drive else 'off'}")
+    print()
+
+    drive = DriveSync(concurrency) if use_drive else None
+    next_poll = time.monotonic()
+
+    # Build once at startup so the site matches what's on disk
+    photos = snapshot(optimize_images.INPUT_DIR)
+    site_inputs = {path: snapshot(path) for path in SITE_INPUTS}
+    photos_dirty, site_dirty, last_change = True, True, 0.0
+    retry_at, backoff = 0.0, RETRY_BACKOFF
+
+    while True:
+        try:
+            if drive and time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + drive_poll
+                try:
+                    drive.poll()
+                except Exception as e:
+                    print(f"   ❌ Drive poll failed: {e}")
+
+            listing = inventory.Inventory(optimize_images.INPUT_DIR)
+            current = file_states(listing)
+            changed = changed_paths(photos, current)
+            if changed:
+                print(f"📝 {len(changed)} photo changes: {', '.join(changed[:5])}"
+                      + (" ..." if len(changed) > 5 else ""))
+                photos, photos_dirty, last_change = current, True, time.monotonic()
+
+            for path in SITE_INPUTS:
+                current = snapshot(path)
+                if changed_paths(site_inputs[path], current):
+                    print(f"📝 {os.path.relpath(path, BASE_DIR)} changed")
+                    site_inputs[path], site_dirty, last_change = current, True, time.monotonic()
+
+            if ((photos_dirty or site_dirty) and time.monotonic() - last_change >= debounce
+                    and time.monotonic() >= retry_at):
+                rebuild(photos_dirty, workers, push, listing)
+                photos_dirty = site_dirty = False
+                retry_at, backoff = 0.0, RETRY_BACKOFF
+                # The build itself may touch drive_links.json etc.
+                site_inputs = {path: snapshot(path) for path in SITE_INPUTS}
+
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+            return
+        except (Exception, SystemExit) as e:
+            # Keep the daemon alive through a bad cycle (network, bad photo, config
+            # typo); the dirty flags stay set so the rebuild is retried
+            print(f"   ❌ Build cycle failed: {e}; retrying in {backoff:.0f}s")
+            retry_at = time.monotonic() + backoff
+            backoff = min(backoff * 2, MAX_RETRY_BACKOFF)
+            time.sleep(interval)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the portfolio continuously as photos change")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Optimize worker processes (default: CPU count)")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Parallel Drive downloads (default: 4)")
+    parser.add_argument('--drive-poll', type=float, default=DEFAULT_DRIVE_POLL,
+                        help=f"Seconds between Drive change polls (default: {DEFAULT_DRIVE_POLL})")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between local scans (default: {DEFAULT_INTERVAL})")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"Quiet seconds before rebuilding (default: {DEFAULT_DEBOUNCE})")
+    parser.add_argument('--no-drive', action='store_true',
+                        help="Only watch local files; don't poll Google Drive")
+    parser.add_argument('--deploy', action='store_true',
+                        help="Commit and push after every rebuild, like deploy.sh")
+    optimize_images.add_arguments(parser)
+    imaging.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def cli(argv=None):
+    """Command-line entry point, also run as `python -m scripts watch`"""
+    args = parse_args(argv)
+    optimize_images.configure_from_args(args)
+    imaging.configure_from_args(args)
+    instrumentation.configure_from_args(args)
+    watch(workers=max(1, args.workers),
+          concurrency=max(1, args.concurrency),
+          drive_poll=max(1.0, args.drive_poll),
+          interval=max(0.1, args.interval),
+          debounce=max(0.0, args.debounce),
+          use_drive=not args.no_drive,
+          push=args.deploy)
+
+if __name__ == '__main__':
+    cli()
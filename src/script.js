@@ -1,8 +1,19 @@
 // Global variables
-let portfolioData = {};
-let currentImages = []; // Images for the currently active tab
-let renderedCount = 0;  // How many images are currently shown
+let portfolioData = {}; // { all, tabs } - each tab: { category, count, shards, images, nextShard }
+let currentTab = null;  // The active tab; its images fill in as shards are fetched
+let currentTabName = null; // Key for the per-tab scroll cache
 const PAGE_SIZE = 12;   // Number of images to load per batch
+let pageSize = PAGE_SIZE; // Overridden by page_size in data/manifest.json
+// This build's data entry point (sharded manifest or single data.json), set by generate_site.py
+const DATA_URL = document.body.dataset.portfolio || 'data.json';
+// Only tiles within this many viewport heights above/below the screen are in the DOM
+const WINDOW_BUFFER = 1;
+const POOL_LIMIT = 60;  // Detached tiles kept for reuse
+const ASSUMED_ASPECT = 2 / 3; // Height/width for images without recorded dimensions
+// Rendered tile width per breakpoint (mirrors --columns in style.css)
+const GALLERY_SIZES = '(max-width: 480px) 100vw, (max-width: 768px) 50vw, 33vw';
+// Modern formats in order of preference; the <img> JPEG is the fallback
+const MODERN_FORMATS = [['avif', 'image/avif'], ['webp', 'image/webp']];
 
 const tabsContainer = document.getElementById('tabs-container');
 const galleryContainer = document.getElementById('gallery-container');
@@ -11,24 +22,21 @@ const galleryContainer = document.getElementById('gallery-container');
 
 async function fetchAndRender() {
     try {
-        const response = await fetch('data.json');
-        portfolioData = await response.json();
+        portfolioData = await loadPortfolio();
 
-        renderTabs(portfolioData.tabs);
+        renderTabs(portfolioData);
 
         // Persistence Logic
         const lastTabName = localStorage.getItem('activeTabCategory') || "ALL PHOTOS";
 
-        // Use pre-shuffled "all_images" if available, otherwise fallback
-        if (lastTabName === "ALL PHOTOS") {
-            currentImages = portfolioData.all_images || getAllImages(portfolioData.tabs);
-        } else {
-            const tab = portfolioData.tabs.find(t => t.category.toUpperCase() === lastTabName);
-            currentImages = tab ? tab.images : [];
+        let tab = portfolioData.all;
+        if (lastTabName !== "ALL PHOTOS") {
+            tab = portfolioData.tabs.find(t => t.category.toUpperCase() === lastTabName)
+                || tabFromImages(lastTabName, []);
         }
 
-        renderGallery(true); // true = reset
         setActiveTab(lastTabName);
+        await showTab(lastTabName, tab);
 
     } catch (error) {
         console.error("Error loading portfolio data:", error);
@@ -36,6 +44,46 @@ async function fetchAndRender() {
     }
 }
 
+// DATA_URL is either the sharded manifest (tabs list their shards) or a single data.json
+async function loadPortfolio() {
+    const response = await fetch(encodeURI(DATA_URL));
+    const data = await response.json();
+
+    if (data.page_size) {
+        pageSize = data.page_size;
+        const withState = tab => ({ ...tab, images: [], nextShard: 0, pending: null });
+        return { all: withState(data.all), tabs: data.tabs.map(withState) };
+    }
+
+    const tabs = data.tabs.map(tab => tabFromImages(tab.category, tab.images));
+
+    // Use pre-shuffled "all_images" ([tab, index] references) if available, otherwise fallback
+    const allImages = data.all_images
+        ? data.all_images.map(ref => Array.isArray(ref) ? data.tabs[ref[0]].images[ref[1]] : ref)
+        : getAllImages(data.tabs);
+    return { all: tabFromImages("ALL PHOTOS", allImages), tabs };
+}
+
+function tabFromImages(category, images) {
+    return { category, count: images.length, shards: [], images, nextShard: 0, pending: null };
+}
+
+// Fetch shards in order until the tab holds at least `needed` images
+async function ensureLoaded(tab, needed) {
+    while (tab.images.length < needed && tab.nextShard < tab.shards.length) {
+        if (!tab.pending) {
+            tab.pending = fetch(encodeURI(tab.shards[tab.nextShard]))
+                .then(response => response.json())
+                .then(page => {
+                    tab.images = tab.images.concat(page);
+                    tab.nextShard++;
+                })
+                .finally(() => { tab.pending = null; });
+        }
+        await tab.pending;
+    }
+}
+
 // Helper functions
 function getAllImages(tabs) {
     let allImages = [];
@@ -45,6 +93,15 @@ function getAllImages(tabs) {
     return allImages;
 }
 
+// source is the image itself (JPEG) or one of its image.formats entries
+function buildSrcset(source, fullWidth) {
+    const candidates = source.variants.map(v => `${v.path} ${v.width}w`);
+    if (fullWidth) {
+        candidates.push(`${source.path} ${fullWidth}w`);
+    }
+    return candidates.join(', ');
+}
+
 function setActiveTab(categoryName) {
     document.querySelectorAll('.nav-item').forEach(item => {
         item.classList.remove('active');
@@ -58,21 +115,20 @@ function setActiveTab(categoryName) {
 
 // --- 2. Navigation Sidebar Rendering ---
 
-function renderTabs(tabs) {
+function renderTabs(portfolio) {
     tabsContainer.innerHTML = '';
 
-    // "All Photos" uses the pre-shuffled list from data.json if available
-    const allImages = portfolioData.all_images || getAllImages(tabs);
-    const allTab = createTabElement("ALL PHOTOS", allImages);
+    // "All Photos" uses the pre-shuffled list built at generation time
+    const allTab = createTabElement("ALL PHOTOS", portfolio.all);
     tabsContainer.appendChild(allTab);
 
-    tabs.forEach(tab => {
-        const tabElement = createTabElement(tab.category, tab.images);
+    portfolio.tabs.forEach(tab => {
+        const tabElement = createTabElement(tab.category, tab);
         tabsContainer.appendChild(tabElement);
     });
 }
 
-function createTabElement(categoryName, images) {
+function createTabElement(categoryName, tab) {
     const a = document.createElement('a');
     a.href = "#";
     a.className = 'nav-item';
@@ -84,98 +140,406 @@ function createTabElement(categoryName, images) {
         setActiveTab(categoryName.toUpperCase());
 
         // Update current context and reset gallery
-        currentImages = images;
-        renderGallery(true);
+        showTab(categoryName.toUpperCase(), tab);
     });
 
     return a;
 }
 
-// --- 3. Gallery Rendering & Pagination ---
-
-function renderGallery(reset = false) {
-    // If resetting, clear container and counters
-    if (reset) {
-        galleryContainer.innerHTML = '';
-        renderedCount = 0;
+// --- 3. Virtualized Gallery ---
+// Tiles are laid out in JS as a masonry of absolutely positioned items, so
+// only those near the viewport need to exist. Off-screen tiles go back to a
+// pool and are re-bound to other images instead of piling up in the DOM.
+
+let layout = { columns: 0, columnWidth: 0, gap: 0, items: [], height: 0, tallest: 0 };
+const rendered = new Map();   // image index -> tile in the DOM
+const prefetched = new Map(); // image index -> detached tile already loading its image
+const pool = [];
+let windowQueued = false;
+let loadingMore = null;
+const scrollPositions = loadScrollPositions(); // Tab name -> window.scrollY
+
+// Edges of the rendered window, and the window itself: when an edge comes
+// within half a viewport of the screen, or a jump leaves the window
+// entirely, the window is recomputed around the new scroll position
+const topSentinel = createSentinel();
+const bottomSentinel = createSentinel();
+const windowRegion = createSentinel();
+const windowObserver = 'IntersectionObserver' in window
+    ? new IntersectionObserver(queueWindowUpdate, { rootMargin: '50% 0px' })
+    : null;
+
+function createSentinel() {
+    const sentinel = document.createElement('div');
+    sentinel.className = 'gallery-sentinel';
+    sentinel.setAttribute('aria-hidden', 'true');
+    return sentinel;
+}
 
-        // Remove existing "Load More" button if any
-        const existingBtn = document.getElementById('load-more-btn');
-        if (existingBtn) existingBtn.remove();
+if ('scrollRestoration' in history) {
+    history.scrollRestoration = 'manual'; // Per-tab positions are restored below
+}
+if (windowObserver) {
+    [topSentinel, bottomSentinel, windowRegion].forEach(sentinel => windowObserver.observe(sentinel));
+} else {
+    window.addEventListener('scroll', queueWindowUpdate, { passive: true });
+}
+window.addEventListener('resize', () => {
+    if (currentTab && relayout()) queueWindowUpdate();
+});
+window.addEventListener('pagehide', saveScrollPosition);
+
+galleryContainer.addEventListener('click', (e) => {
+    const tile = e.target.closest('.gallery-item');
+    if (!tile || !tile.image) return;
+    window.open(tile.image.drive_url || tile.image.path, '_blank');
+});
+
+async function showTab(tabName, tab) {
+    saveScrollPosition();
+    currentTab = tab;
+    currentTabName = tabName;
+    resetGallery();
+
+    if (tab.count === 0) {
+        showMessage('No photos found in this category.');
+        return;
     }
 
-    if (currentImages.length === 0) {
-        galleryContainer.innerHTML = '<div id="loading-message">No photos found in this category.</div>';
-        return;
+    // Load enough pages to reach this tab's last scroll position
+    const target = scrollPositions[tabName] || 0;
+    try {
+        await ensureLoaded(tab, pageSize);
+        if (tab !== currentTab) return; // Tab switched while the shard was loading
+        relayout();
+        while (galleryTop() + layout.height < target + window.innerHeight && tab.images.length < tab.count) {
+            const loaded = tab.images.length;
+            await ensureLoaded(tab, loaded + pageSize);
+            if (tab !== currentTab) return;
+            if (tab.images.length === loaded) break; // No more shards
+            relayout();
+        }
+    } catch (error) {
+        // Called straight from tab clicks, so nothing else would catch this
+        console.error("Error loading photos:", error);
+        if (tab !== currentTab) return;
+        if (tab.images.length === 0) {
+            showMessage('Failed to load photos. Please try again.');
+            return;
+        }
+        relayout(); // Show whatever did load
     }
+    window.scrollTo(0, Math.min(target, galleryTop() + layout.height));
+    updateWindow();
+}
 
-    // Determine slice range
-    const start = renderedCount;
-    const end = Math.min(renderedCount + PAGE_SIZE, currentImages.length);
-    const batch = currentImages.slice(start, end);
+function showMessage(text) {
+    const message = document.createElement('div');
+    message.id = 'loading-message';
+    message.textContent = text;
+    galleryContainer.appendChild(message);
+}
 
-    // Render batch
-    batch.forEach(image => {
-        const item = document.createElement('div');
-        item.className = 'gallery-item';
+function loadScrollPositions() {
+    try {
+        return JSON.parse(sessionStorage.getItem('tabScroll')) || {};
+    } catch (error) {
+        return {};
+    }
+}
 
-        const img = document.createElement('img');
-        img.src = image.path;
-        img.alt = image.name;
-        img.loading = 'lazy';
+function saveScrollPosition() {
+    if (!currentTabName) return;
+    scrollPositions[currentTabName] = window.scrollY;
+    sessionStorage.setItem('tabScroll', JSON.stringify(scrollPositions));
+}
 
-        if (image.drive_url) {
-            img.style.cursor = 'pointer';
-            img.title = "Click to view in Google Drive";
-        }
+function resetGallery() {
+    rendered.forEach(tile => releaseTile(tile));
+    rendered.clear();
+    prefetched.forEach(tile => releaseTile(tile));
+    prefetched.clear();
+    galleryContainer.innerHTML = '';
+    galleryContainer.append(topSentinel, bottomSentinel, windowRegion);
+    galleryContainer.style.height = '';
+    layout = { columns: 0, columnWidth: 0, gap: 0, items: [], height: 0, tallest: 0 };
+}
+
+// Column count and gap come from style.css (--columns / --gap per breakpoint)
+function galleryMetrics() {
+    const style = getComputedStyle(galleryContainer);
+    const columns = Math.max(1, parseInt(style.getPropertyValue('--columns'), 10) || 1);
+    const gap = parseFloat(style.getPropertyValue('--gap')) || 0;
+    const width = galleryContainer.clientWidth;
+    return { columns, gap, columnWidth: (width - gap * (columns - 1)) / columns };
+}
 
-        item.addEventListener('click', () => {
-            const url = image.drive_url || image.path;
-            window.open(url, '_blank');
+// Place every loaded image of the current tab; returns true if anything moved.
+// Each image goes into the shortest column, so item tops never decrease.
+function relayout() {
+    const metrics = galleryMetrics();
+    const images = currentTab.images;
+    const unchanged = metrics.columns === layout.columns
+        && metrics.columnWidth === layout.columnWidth && metrics.gap === layout.gap;
+    if (unchanged && layout.items.length === images.length) return false;
+
+    // Same geometry: only the newly loaded images need placing
+    const start = unchanged ? layout.items.length : 0;
+    const items = unchanged ? layout.items : [];
+    const heights = unchanged && layout.columnHeights
+        ? layout.columnHeights
+        : new Array(metrics.columns).fill(0);
+    let tallest = unchanged ? layout.tallest : 0;
+
+    for (let i = start; i < images.length; i++) {
+        const image = images[i];
+        const aspect = image.width && image.height ? image.height / image.width : ASSUMED_ASPECT;
+        const height = Math.round(metrics.columnWidth * aspect);
+        const column = heights.indexOf(Math.min(...heights));
+        items.push({
+            x: column * (metrics.columnWidth + metrics.gap),
+            y: heights[column],
+            height
         });
+        heights[column] += height + metrics.gap;
+        tallest = Math.max(tallest, height);
+    }
+
+    layout = { ...metrics, items, columnHeights: heights, tallest,
+               height: Math.max(0, Math.max(...heights) - metrics.gap) };
+    galleryContainer.style.height = `${layout.height}px`;
+    rendered.forEach((tile, index) => positionTile(tile, index));
+    return true;
+}
+
+function galleryTop() {
+    return galleryContainer.getBoundingClientRect().top + window.scrollY;
+}
 
-        item.appendChild(img);
-        galleryContainer.appendChild(item);
+function queueWindowUpdate() {
+    if (windowQueued) return;
+    windowQueued = true;
+    requestAnimationFrame(() => {
+        windowQueued = false;
+        updateWindow();
     });
+}
+
+// First item whose top is at or below y (item tops are sorted)
+function firstItemFrom(y) {
+    let low = 0;
+    let high = layout.items.length;
+    while (low < high) {
+        const mid = (low + high) >> 1;
+        if (layout.items[mid].y < y) low = mid + 1;
+        else high = mid;
+    }
+    return low;
+}
+
+// Render exactly the tiles that overlap the viewport plus WINDOW_BUFFER
+function updateWindow() {
+    const tab = currentTab;
+    if (!tab || tab.count === 0) return;
+
+    const viewTop = -galleryContainer.getBoundingClientRect().top;
+    const buffer = window.innerHeight * WINDOW_BUFFER;
+    const top = Math.max(0, viewTop - buffer);
+    const bottom = Math.min(layout.height, viewTop + window.innerHeight + buffer);
+
+    const visible = new Set();
+    for (let i = firstItemFrom(top - layout.tallest); i < layout.items.length; i++) {
+        const item = layout.items[i];
+        if (item.y >= bottom) break;
+        if (item.y + item.height > top) visible.add(i);
+    }
+
+    rendered.forEach((tile, index) => {
+        if (!visible.has(index)) {
+            rendered.delete(index);
+            releaseTile(tile);
+        }
+    });
+    let last = -1;
+    visible.forEach(index => {
+        last = Math.max(last, index);
+        if (rendered.has(index)) return;
+        let tile = prefetched.get(index);
+        if (tile) {
+            prefetched.delete(index);
+        } else {
+            tile = bindTile(acquireTile(), tab.images[index]);
+        }
+        positionTile(tile, index);
+        galleryContainer.appendChild(tile);
+        rendered.set(index, tile);
+    });
+
+    placeSentinel(topSentinel, top, 1);
+    placeSentinel(bottomSentinel, Math.max(top, bottom - 1), 1);
+    placeSentinel(windowRegion, top, Math.max(1, bottom - top));
 
-    renderedCount = end;
+    // Near the end of what's loaded: fetch the next page
+    if (viewTop + window.innerHeight + buffer >= layout.height && tab.images.length < tab.count) {
+        loadMore(tab);
+    }
+    schedulePrefetch(tab, last + 1);
+}
 
-    // Manage "Load More" Button
-    updateLoadMoreButton();
+function placeSentinel(sentinel, y, height) {
+    sentinel.style.transform = `translateY(${y}px)`;
+    sentinel.style.height = `${height}px`;
 }
 
-function updateLoadMoreButton() {
-    // Try to find helper container or create one
-    let btnContainer = document.getElementById('pagination-container');
-    if (!btnContainer) {
-        btnContainer = document.createElement('div');
-        btnContainer.id = 'pagination-container';
-        btnContainer.style.textAlign = 'center';
-        btnContainer.style.padding = '20px';
-        // Insert after gallery container
-        galleryContainer.parentNode.insertBefore(btnContainer, galleryContainer.nextSibling);
+async function loadMore(tab) {
+    if (loadingMore) return;
+    const loaded = tab.images.length;
+    loadingMore = ensureLoaded(tab, loaded + pageSize);
+    try {
+        await loadingMore;
+    } catch (error) {
+        console.error("Error loading more photos:", error);
+        return;
+    } finally {
+        loadingMore = null;
     }
+    if (tab !== currentTab || tab.images.length === loaded) return;
+    relayout();
+    updateWindow();
+}
 
-    btnContainer.innerHTML = ''; // Clear
+// --- 4. Tiles ---
 
-    if (renderedCount < currentImages.length) {
-        const btn = document.createElement('button');
-        btn.textContent = 'LOAD MORE';
-        btn.style.padding = '12px 30px';
-        btn.style.fontSize = '14px';
-        btn.style.letterSpacing = '1px';
-        btn.style.cursor = 'pointer';
-        btn.style.backgroundColor = '#333';
-        btn.style.color = 'white';
-        btn.style.border = 'none';
-        btn.style.borderRadius = '4px';
+function acquireTile() {
+    return pool.pop() || createTile();
+}
 
-        btn.addEventListener('click', () => {
-            renderGallery(false);
-        });
+// Detach a tile and drop its image so the decoded bitmap can be freed
+function releaseTile(tile) {
+    tile.remove();
+    tile.image = null;
+    tile.img.removeAttribute('srcset');
+    tile.img.removeAttribute('src');
+    tile.sources.forEach(source => source.removeAttribute('srcset'));
+    if (pool.length < POOL_LIMIT) pool.push(tile);
+}
 
-        btnContainer.appendChild(btn);
+function createTile() {
+    const tile = document.createElement('div');
+    tile.className = 'gallery-item';
+
+    const picture = document.createElement('picture');
+    // One <source> per modern format; unused ones keep no srcset and are skipped
+    tile.sources = MODERN_FORMATS.map(([ext, mimeType]) => {
+        const source = document.createElement('source');
+        source.type = mimeType;
+        source.sizes = GALLERY_SIZES;
+        picture.appendChild(source);
+        return source;
+    });
+
+    const img = document.createElement('img');
+    img.decoding = 'async';
+    img.addEventListener('load', () => {
+        tile.classList.remove('has-placeholder');
+        // Images without recorded dimensions were placed with ASSUMED_ASPECT
+        const image = tile.image;
+        if (image && !(image.width && image.height) && img.naturalWidth) {
+            image.width = img.naturalWidth;
+            image.height = img.naturalHeight;
+            layout.columns = 0; // Force a full relayout
+            if (relayout()) queueWindowUpdate();
+        }
+    });
+    // A missing or undecodable image shows the broken-image state instead of
+    // a tile left blank behind the placeholder forever
+    img.addEventListener('error', () => {
+        if (img.getAttribute('src')) tile.classList.remove('has-placeholder');
+    });
+    picture.appendChild(img);
+    tile.appendChild(picture);
+    tile.img = img;
+    return tile;
+}
+
+function bindTile(tile, image, priority = 'auto') {
+    const img = tile.img;
+    tile.image = image;
+    img.fetchPriority = priority;
+    img.alt = image.name;
+
+    // Reserve the final aspect ratio and paint a placeholder until it loads
+    if (image.width && image.height) {
+        img.width = image.width;
+        img.height = image.height;
+    } else {
+        img.removeAttribute('width');
+        img.removeAttribute('height');
+    }
+    if (image.orientation) {
+        tile.dataset.orientation = image.orientation;
+    } else {
+        delete tile.dataset.orientation;
     }
+    tile.style.backgroundColor = image.color || '';
+    tile.style.backgroundImage = image.placeholder ? `url("${image.placeholder}")` : '';
+    tile.classList.toggle('has-placeholder', Boolean(image.placeholder));
+
+    MODERN_FORMATS.forEach(([ext], i) => {
+        const format = image.formats && image.formats[ext];
+        if (format) {
+            tile.sources[i].srcset = buildSrcset(format, image.width);
+        } else {
+            tile.sources[i].removeAttribute('srcset');
+        }
+    });
+
+    // Let the browser pick the smallest derivative that fills the column
+    if (image.variants && image.variants.length) {
+        img.sizes = GALLERY_SIZES;
+        img.srcset = buildSrcset(image, image.width);
+    } else {
+        img.removeAttribute('srcset');
+    }
+    img.src = image.path;
+
+    if (image.drive_url) {
+        img.style.cursor = 'pointer';
+        img.title = "Click to view in Google Drive";
+    } else {
+        img.style.cursor = '';
+        img.removeAttribute('title');
+    }
+    return tile;
+}
+
+function positionTile(tile, index) {
+    const item = layout.items[index];
+    if (!item) return;
+    tile.style.transform = `translate(${item.x}px, ${item.y}px)`;
+    tile.style.width = `${layout.columnWidth}px`;
+    tile.style.height = `${item.height}px`;
+}
+
+// Start the next page's downloads at low priority while the browser is idle.
+// The detached tiles pick the same <picture> candidate the visible ones
+// will, and are moved into the gallery as-is once scrolled to.
+function schedulePrefetch(tab, from) {
+    const idle = window.requestIdleCallback || (callback => setTimeout(callback, 200));
+    idle(() => {
+        if (tab !== currentTab) return;
+        const end = Math.min(from + pageSize, tab.images.length);
+        prefetched.forEach((tile, index) => {
+            if (index < from || index >= end) {
+                prefetched.delete(index);
+                releaseTile(tile);
+            }
+        });
+        for (let index = from; index < end; index++) {
+            if (rendered.has(index) || prefetched.has(index)) continue;
+            prefetched.set(index, bindTile(acquireTile(), tab.images[index], 'low'));
+        }
+    });
 }
 
 
@@ -0,0 +1,50 @@
+"""
+dedup.find_duplicates on hand-made hash cache entries
+Run with `python -m pytest tests` or `python -m unittest discover tests`
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import dedup
+
+def entry(hash_hex, thumb, aspect=1.5, pixels=1000):
+    return {'hash': hash_hex, 'pixels': pixels, 'aspect': aspect, 'thumb': bytes(thumb).hex()}
+
+DETAILED = 'f0f0a5a5c3c31234'
+GRADIENT = list(range(192))
+
+class FindDuplicatesTest(unittest.TestCase):
+
+    def find(self, hashes):
+        sources = [(key, key, 100) for key in hashes]
+        return dedup.find_duplicates(sources, hashes, max_distance=3)
+
+    def test_aliases_a_smaller_copy_of_the_same_picture(self):
+        hashes = {
+            'large.jpg': entry(DETAILED, GRADIENT, pixels=4000),
+            'small.jpg': entry('f0f0a5a5c3c31235', [value + 3 for value in GRADIENT]),
+        }
+        self.assertEqual(self.find(hashes), {'small.jpg': 'large.jpg'})
+
+    def test_flat_images_are_never_aliased(self):
+        hashes = {
+            'blue.jpg': entry('0' * 16, [0, 0, 255] * 64, aspect=1.5),
+            'orange.jpg': entry('0' * 16, [255, 128, 0] * 64, aspect=2 / 3),
+            'also-blue.jpg': entry('f' * 16, [0, 0, 255] * 64, aspect=1.5),
+        }
+        self.assertEqual(self.find(hashes), {})
+
+    def test_hash_match_needs_matching_shape_and_pixels(self):
+        hashes = {
+            'photo.jpg': entry(DETAILED, GRADIENT, pixels=4000),
+            'portrait.jpg': entry(DETAILED, GRADIENT, aspect=2 / 3),
+            'inverted.jpg': entry(DETAILED, [255 - value for value in GRADIENT]),
+        }
+        self.assertEqual(self.find(hashes), {})
+
+if __name__ == '__main__':
+    unittest.main()
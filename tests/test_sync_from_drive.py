@@ -0,0 +1,117 @@
+"""
+sync_from_drive against benchmark.FakeDrive, with injected transfer failures
+Run with `python -m pytest tests` or `python -m unittest discover tests`
+"""
+
+import os
+import sys
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+import benchmark
+import sync_from_drive
+
+CHUNK_SIZE = 1024
+PARENT_ID = 'parent'
+
+class HttpError(Exception):
+    """Shaped like googleapiclient's HttpError as far as http_status() cares"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = mock.Mock(status=status)
+
+class FlakyDrive(benchmark.FakeDrive):
+    """FakeDrive that logs every ranged request and fails the ones told to
+
+    failures maps a range start to a list of exceptions, raised (and used
+    up) one per request for that range.
+    """
+
+    def __init__(self, root, parent_id):
+        super().__init__(root, parent_id)
+        self.requests = []
+        self.failures = {}
+
+    def get_media(self, fileId):
+        request = super().get_media(fileId)
+        read_range = request._execute
+
+        def execute(request):
+            start = int(request.headers['Range'][len('bytes='):].split('-')[0])
+            self.requests.append(start)
+            if self.failures.get(start):
+                raise self.failures[start].pop(0)
+            return read_range(request)
+        request._execute = execute
+        return request
+
+class SyncPhotosTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.workdir = tmp.name
+        remote_dir = os.path.join(self.workdir, 'remote')
+        self.photos_dir = os.path.join(self.workdir, 'photos')
+        os.makedirs(os.path.join(remote_dir, 'Travel'))
+        self.content = random.Random(0).randbytes(CHUNK_SIZE * 4 + 100)
+        with open(os.path.join(remote_dir, 'Travel', 'beach.jpg'), 'wb') as f:
+            f.write(self.content)
+        self.drive = FlakyDrive(remote_dir, PARENT_ID)
+
+        cwd = os.getcwd()
+        os.chdir(self.workdir)  # drive_links.json is written to the cwd
+        self.addCleanup(os.chdir, cwd)
+        for name, value in [
+                ('_config', {'google_drive_folder_id': PARENT_ID}),
+                ('LOCAL_PHOTOS_DIR', self.photos_dir),
+                ('SYNC_STATE_PATH', os.path.join(self.photos_dir, '.sync_state.json')),
+                ('RETRY_BASE_DELAY', 0.0),
+                ('MAX_RETRIES', 2),
+                ('load_credentials', lambda: 'fake-credentials'),
+                ('build_service', lambda creds: self.drive)]:
+            patcher = mock.patch.object(sync_from_drive, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sync(self):
+        sync_from_drive.sync_photos(concurrency=1, chunk_size=CHUNK_SIZE)
+
+    def test_retries_rate_limits_and_resumes_partial_downloads(self):
+        destination = os.path.join(self.photos_dir, 'Travel', 'beach.jpg')
+        partial = destination + sync_from_drive.PARTIAL_SUFFIX
+
+        # A 429 on the second chunk is retried; the connection then drops for
+        # good on the fourth, past MAX_RETRIES
+        self.drive.failures = {
+            CHUNK_SIZE: [HttpError(429)],
+            CHUNK_SIZE * 3: [ConnectionResetError("connection dropped")] * 3,
+        }
+        self.sync()
+        self.assertEqual(self.drive.requests.count(CHUNK_SIZE), 2)
+        self.assertEqual(self.drive.requests.count(CHUNK_SIZE * 3), 3)
+        self.assertFalse(os.path.exists(destination))
+        with open(partial, 'rb') as f:
+            self.assertEqual(f.read(), self.content[:CHUNK_SIZE * 3])
+
+        # The next (delta) sync picks up where the .part file left off
+        self.drive.requests = []
+        self.sync()
+        self.assertEqual(self.drive.requests, [CHUNK_SIZE * 3, CHUNK_SIZE * 4])
+        self.assertFalse(os.path.exists(partial))
+        with open(destination, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_gives_up_on_errors_that_are_not_retryable(self):
+        self.drive.failures = {0: [HttpError(404)]}
+        self.sync()
+        self.assertEqual(self.drive.requests, [0])
+        self.assertFalse(os.path.exists(os.path.join(self.photos_dir, 'Travel', 'beach.jpg')))
+
+if __name__ == '__main__':
+    unittest.main()